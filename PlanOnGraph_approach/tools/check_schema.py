@@ -2,6 +2,8 @@ from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
 from typing import Dict, Any, List, Tuple
 import re
 
+import schema_cache
+
 RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
 XSD_NS   = "http://www.w3.org/2001/XMLSchema#"
 
@@ -47,36 +49,6 @@ def _extract_types(triples: List[Tuple[str,str,str]]) -> Dict[str, set]:
             types.setdefault(s, set()).add(o)
     return types
 
-def _load_properties(schema: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
-    prop_map: Dict[str, Dict[str, Any]] = {}
-    props = schema.get("properties")
-    if not props:
-        return prop_map
-
-    # normalized list
-    if isinstance(props, list) and props and isinstance(props[0], dict) and "iri" in props[0]:
-        for p in props:
-            iri   = p.get("iri")
-            ptype = p.get("type")
-            dom   = p.get("domain")
-            rng   = p.get("range")
-            if iri:
-                prop_map[iri] = {"type": ptype, "domain": dom, "range": rng}
-        return prop_map
-
-    # raw SPARQL JSON
-    if isinstance(props, dict) and "results" in props:
-        for b in props.get("results", {}).get("bindings", []):
-            iri   = b.get("p", {}).get("value")
-            ptype = b.get("type", {}).get("value")
-            dom   = b.get("domain", {}).get("value") if "domain" in b else None
-            rng   = b.get("range", {}).get("value")  if "range"  in b else None
-            if iri:
-                prop_map[iri] = {"type": ptype, "domain": dom, "range": rng}
-        return prop_map
-
-    return prop_map
-
 @tool(
     name="check_schema",
     description="Validate triple patterns against domain/range from schema. Returns ok plus issues list.",
@@ -99,8 +71,8 @@ def check_schema(ontology_schema: Dict[str, Any], triples: List[List[str]]) -> D
             else:
                 issues.append({"level":"warn","code":"bad_triple","message":"Malformed triple skipped", "triple": str(t)})
 
-    # properties map
-    props = _load_properties(ontology_schema)
+    # properties map (precompiled index, shared with get_schema when "schema_version" is present)
+    props = schema_cache.index_for(ontology_schema).properties
 
     # rdf:type facts from provided triples
     types = _extract_types(tlist)
@@ -112,18 +84,20 @@ def check_schema(ontology_schema: Dict[str, Any], triples: List[List[str]]) -> D
             issues.append({"level":"error","code":"unknown_predicate","message":"Predicate not found in schema", "triple":[s,p,o]})
             continue
 
-        dom = meta.get("domain")
-        rng = meta.get("range")
+        doms = meta["domains"]
+        rngs = meta["ranges"]
+        dom = " or ".join(doms)
+        rng = " or ".join(rngs)
 
-        if dom and s in types and dom not in types[s]:
+        if doms and s in types and types[s].isdisjoint(doms):
             issues.append({"level":"warn","code":"domain_mismatch_possible","message":f"Subject types {list(types[s])} do not include domain {dom}", "triple":[s,p,o]})
 
-        if rng:
-            if rng.startswith(XSD_NS):
-                if not _is_literal(o) or not _parse_xsd(o, rng):
+        if rngs:
+            if all(r.startswith(XSD_NS) for r in rngs):
+                if not _is_literal(o) or not any(_parse_xsd(o, r) for r in rngs):
                     issues.append({"level":"warn","code":"datatype_mismatch","message":f"Object literal not matching {rng}", "triple":[s,p,o]})
             else:
-                if o in types and rng not in types[o]:
+                if o in types and types[o].isdisjoint(rngs):
                     issues.append({"level":"warn","code":"range_mismatch_possible","message":f"Object types {list(types[o])} do not include range {rng}", "triple":[s,p,o]})
 
     ok = not any(i for i in issues if i["level"] == "error")
@@ -1,26 +1,20 @@
 from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
+from typing import Dict, Any, List, Tuple
 import os
-import requests
-from typing import Dict, Any, List
 
-OUT_TPL = "SELECT DISTINCT ?n WHERE { <{e}> <{p}> ?n } LIMIT {limit}"
-IN_TPL  = "SELECT DISTINCT ?n WHERE { ?n <{p}> <{e}> } LIMIT {limit}"
+from sparql_client import select
 
-def _post(endpoint: str, query: str) -> Dict[str, Any]:
-    endpoint = (endpoint or os.getenv("FUSEKI_ENDPOINT", "")).strip()
-    if not endpoint:
-        return {"error": "Missing endpoint_url (and FUSEKI_ENDPOINT not set)"}
-    headers = {
-        "Accept": "application/sparql-results+json",
-        "Content-Type": "application/sparql-query",
-    }
-    resp = requests.post(endpoint, data=query.encode("utf-8"), headers=headers, timeout=60)
-    if resp.status_code >= 400:
-        return {"error": f"HTTP {resp.status_code}: {resp.text[:500]}"}
-    try:
-        return resp.json()
-    except ValueError:
-        return {"error": f"Non-JSON response: {resp.text[:500]}"}
+OUT_TPL = "SELECT DISTINCT ?n WHERE {{ <{e}> <{p}> ?n }} LIMIT {limit}"
+IN_TPL  = "SELECT DISTINCT ?n WHERE {{ ?n <{p}> <{e}> }} LIMIT {limit}"
+
+# Batched form: one query per direction and entity chunk, entity x relation via VALUES.
+# LIMIT is limit x pairs; if a result hits it, groups still short of their limit may have
+# been crowded out by a hub, so those are re-read with per-pair LIMITed subqueries.
+OUT_BATCH_TPL = "SELECT DISTINCT ?e ?p ?n WHERE { VALUES ?e { %(ents)s } VALUES ?p { %(rels)s } ?e ?p ?n } LIMIT %(cap)d"
+IN_BATCH_TPL  = "SELECT DISTINCT ?e ?p ?n WHERE { VALUES ?e { %(ents)s } VALUES ?p { %(rels)s } ?n ?p ?e } LIMIT %(cap)d"
+OUT_PAIR_SUB  = "{ SELECT DISTINCT ?e ?p ?n WHERE { BIND(<%(e)s> AS ?e) BIND(<%(p)s> AS ?p) <%(e)s> <%(p)s> ?n } LIMIT %(limit)d }"
+IN_PAIR_SUB   = "{ SELECT DISTINCT ?e ?p ?n WHERE { BIND(<%(e)s> AS ?e) BIND(<%(p)s> AS ?p) ?n <%(p)s> <%(e)s> } LIMIT %(limit)d }"
+CHUNK_ENTITIES = int(os.getenv("POG_VALUES_CHUNK", "50"))     # entities per VALUES block (endpoint query-size limits)
 
 def _sanitize_iri(iri: str) -> str:
     s = (iri or "").strip()
@@ -50,7 +44,7 @@ def get_neighbors(endpoint_url: str, entity_iri: str, relation_iri: str, directi
         return {"error": "direction must be 'out' or 'in'"}
 
     sparql = (OUT_TPL if direction == "out" else IN_TPL).format(e=e, p=p, limit=int(limit))
-    data = _post(endpoint_url, sparql)
+    data = select(endpoint_url, sparql)
     if "error" in data:
         return {"error": data["error"]}
 
@@ -75,3 +69,78 @@ def get_neighbors(endpoint_url: str, entity_iri: str, relation_iri: str, directi
             seen.add(tt)
 
     return {"candidates": [t[-1] for t in triples_unique], "triples": triples_unique}
+
+def _expand(endpoint_url: str, entities: List[str], relations: List[str], direction: str,
+            limit: int) -> Tuple[Dict[Tuple[str, str], List[str]], str]:
+    """(entity, relation) -> neighbors (at most `limit` each) for one direction; second item is an error."""
+    groups: Dict[Tuple[str, str], List[str]] = {(e, p): [] for e in entities for p in relations}
+    rels = " ".join(f"<{p}>" for p in relations)
+    tpl, sub = (OUT_BATCH_TPL, OUT_PAIR_SUB) if direction == "out" else (IN_BATCH_TPL, IN_PAIR_SUB)
+    for i in range(0, len(entities), CHUNK_ENTITIES):
+        chunk = entities[i:i + CHUNK_ENTITIES]
+        cap = limit * len(chunk) * len(relations)
+        data = select(endpoint_url, tpl % {"ents": " ".join(f"<{e}>" for e in chunk), "rels": rels, "cap": cap})
+        if "error" in data:
+            return groups, data["error"]
+        bindings = data.get("results", {}).get("bindings", [])
+        for b in bindings:
+            key = (b.get("e", {}).get("value"), b.get("p", {}).get("value"))
+            n = b.get("n", {}).get("value")
+            if n and key in groups and len(groups[key]) < limit:
+                groups[key].append(n)
+        if len(bindings) < cap:
+            continue
+        short = [(e, p) for e in chunk for p in relations if len(groups[(e, p)]) < limit]
+        if not short:
+            continue
+        subs = " UNION ".join(sub % {"e": e, "p": p, "limit": limit} for e, p in short)
+        data = select(endpoint_url, f"SELECT ?e ?p ?n WHERE {{ {subs} }}")
+        if "error" in data:
+            return groups, data["error"]
+        for e, p in short:
+            groups[(e, p)] = []
+        for b in data.get("results", {}).get("bindings", []):
+            key = (b.get("e", {}).get("value"), b.get("p", {}).get("value"))
+            n = b.get("n", {}).get("value")
+            if n and key in groups and len(groups[key]) < limit:
+                groups[key].append(n)
+    return groups, ""
+
+@tool(
+    name="get_neighbors_batch",
+    description="Fetch neighbors for many entities x relations at once (direction 'out', 'in' or 'both'). Returns per-(entity, relation) groups plus merged candidates and triples.",
+    permission=ToolPermission.ADMIN
+)
+def get_neighbors_batch(endpoint_url: str, entity_iris: List[str], relation_iris: List[str],
+                        direction: str = "both", limit: int = 100) -> dict:
+    """
+    :param endpoint_url: Fuseki endpoint (uses FUSEKI_ENDPOINT if empty)
+    :param entity_iris: frontier entity IRIs (with or without angle brackets)
+    :param relation_iris: predicate IRIs (with or without angle brackets)
+    :param direction: "out", "in" or "both"
+    :param limit: max neighbors per (entity, relation, direction) group (default 100)
+    :return: {"groups": [{"entity", "relation", "direction", "candidates", "triples"}, ...],
+              "candidates": [...], "triples": [[s,p,o], ...]} or {"error": "..."}
+    """
+    ents = list(dict.fromkeys(e for e in map(_sanitize_iri, entity_iris or []) if e))
+    rels = list(dict.fromkeys(p for p in map(_sanitize_iri, relation_iris or []) if p))
+    if not ents or not rels:
+        return {"error": "Empty entity_iris or relation_iris"}
+    if direction not in ("out", "in", "both"):
+        return {"error": "direction must be 'out', 'in' or 'both'"}
+    limit = max(1, int(limit))
+
+    out_groups: List[Dict[str, Any]] = []
+    for d in (("out", "in") if direction == "both" else (direction,)):
+        groups, err = _expand(endpoint_url, ents, rels, d, limit)
+        if err:
+            return {"error": err}
+        for (e, p), ns in groups.items():
+            if ns:
+                triples = [[e, p, n] if d == "out" else [n, p, e] for n in ns]
+                out_groups.append({"entity": e, "relation": p, "direction": d, "candidates": ns, "triples": triples})
+
+    # merged views, deduped while preserving order (same shape as get_neighbors)
+    triples = list({tuple(t): t for g in out_groups for t in g["triples"]}.values())
+    candidates = list(dict.fromkeys(n for g in out_groups for n in g["candidates"]))
+    return {"groups": out_groups, "candidates": candidates, "triples": triples}
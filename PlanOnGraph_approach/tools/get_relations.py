@@ -1,31 +1,7 @@
 from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
-import os
-import requests
-from typing import Dict, Any, List
+from typing import Dict, List
 
-RELATIONS_TPL = """
-SELECT ?p (COUNT(*) AS ?count) WHERE {
-  { <{entity}> ?p ?o } UNION { ?s ?p <{entity}> }
-}
-GROUP BY ?p
-ORDER BY DESC(?count)
-"""
-
-def _post(endpoint: str, query: str) -> Dict[str, Any]:
-    endpoint = (endpoint or os.getenv("FUSEKI_ENDPOINT", "")).strip()
-    if not endpoint:
-        return {"error": "Missing endpoint_url (and FUSEKI_ENDPOINT not set)"}
-    headers = {
-        "Accept": "application/sparql-results+json",
-        "Content-Type": "application/sparql-query",
-    }
-    resp = requests.post(endpoint, data=query.encode("utf-8"), headers=headers, timeout=60)
-    if resp.status_code >= 400:
-        return {"error": f"HTTP {resp.status_code}: {resp.text[:500]}"}
-    try:
-        return resp.json()
-    except ValueError:
-        return {"error": f"Non-JSON response: {resp.text[:500]}"}
+import relation_index
 
 def _sanitize_iri(iri: str) -> str:
     """Remove surrounding angle brackets/spaces; return the bare IRI string."""
@@ -43,27 +19,42 @@ def get_relations(endpoint_url: str, entity_iri: str) -> dict:
     """
     :param endpoint_url: Fuseki endpoint (fallback to FUSEKI_ENDPOINT)
     :param entity_iri: Full IRI of the entity (with or without angle brackets)
-    :return: {"relations": [{"iri": "...", "count": 12}, ...]} or {"error": "..."}
+    :return: {"relations": [{"iri": "...", "count": 12, "out": 10, "in": 2}, ...]} or {"error": "..."}
     """
     e = _sanitize_iri(entity_iri)
     if not e:
         return {"error": "Empty entity_iri"}
 
-    sparql = RELATIONS_TPL.format(entity=e)
-    data = _post(endpoint_url, sparql)
-    if "error" in data:
-        return {"error": data["error"]}
+    # degrees come from the materialized relation index (no adjacency scan per call)
+    table, err = relation_index.degrees(endpoint_url, [e])
+    if err:
+        return {"error": err}
+    return {"relations": relation_index.relations(table[e])}
 
-    bindings = data.get("results", {}).get("bindings", []) if isinstance(data, dict) else []
-    rels: List[Dict[str, Any]] = []
-    for b in bindings:
-        p = b.get("p", {}).get("value")
-        c = b.get("count", {}).get("value")
-        if p:
-            try:
-                cnt = int(float(c)) if c is not None else 0
-            except Exception:
-                cnt = 0
-            rels.append({"iri": p, "count": cnt})
+@tool(
+    name="get_relations_batch",
+    description="List adjacent predicates (incoming + outgoing, with counts) for many entities in one call.",
+    permission=ToolPermission.ADMIN
+)
+def get_relations_batch(endpoint_url: str, entity_iris: List[str]) -> dict:
+    """
+    :param endpoint_url: Fuseki endpoint (fallback to FUSEKI_ENDPOINT)
+    :param entity_iris: entity IRIs (with or without angle brackets)
+    :return: {"by_entity": {iri: [{"iri": "...", "count": 12, "out": 10, "in": 2}, ...]},
+              "relations": [...merged over all entities, counts summed...]} or {"error": "..."}
+    """
+    ents = list(dict.fromkeys(e for e in map(_sanitize_iri, entity_iris or []) if e))
+    if not ents:
+        return {"error": "Empty entity_iris"}
 
-    return {"relations": rels}
+    table, err = relation_index.degrees(endpoint_url, ents)
+    if err:
+        return {"error": err}
+    merged: Dict[str, List[int]] = {}
+    for preds in table.values():
+        for p, (o, i) in preds.items():
+            m = merged.setdefault(p, [0, 0])
+            m[0] += o
+            m[1] += i
+    return {"by_entity": {e: relation_index.relations(table[e]) for e in ents},
+            "relations": relation_index.relations(merged)}
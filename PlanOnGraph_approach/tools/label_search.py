@@ -1,7 +1,10 @@
 from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
-import os, requests
+import os
 from typing import List, Dict, Any
 
+import schema_cache
+from sparql_client import select
+
 ADTO_NS = os.getenv("ADTO_NS", "http://www.projectsynapse.com/ontologies/adto#")
 
 LABEL_OR_NAME_SEARCH = """
@@ -39,21 +42,19 @@ WHERE {
 LIMIT 100
 """
 
-def _post(endpoint: str, query: str) -> Dict[str, Any]:
-    endpoint = (endpoint or os.getenv("FUSEKI_ENDPOINT", "")).strip()
-    if not endpoint:
-        return {"error": "Missing endpoint_url (and FUSEKI_ENDPOINT not set)"}
-    headers = {
-        "Accept": "application/sparql-results+json",
-        "Content-Type": "application/sparql-query",
-    }
-    resp = requests.post(endpoint, data=query.encode("utf-8"), headers=headers, timeout=60)
-    if resp.status_code >= 400:
-        return {"error": f"HTTP {resp.status_code}: {resp.text[:500]}"}
-    try:
-        return resp.json()
-    except ValueError:
-        return {"error": f"Non-JSON response: {resp.text[:500]}"}
+# Same fallback once the schema index has resolved the matching classes (no label scan)
+CLASS_INSTANCE_VALUES = """
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX adto: <%(ADTO)s>
+SELECT DISTINCT ?e (COALESCE(?n1, ?n2, ?clsLabel, STR(?e)) AS ?name)
+WHERE {
+  VALUES (?cls ?clsLabel) { %(classes)s }
+  ?e a ?cls .
+  OPTIONAL { ?e adto:hasName ?n1 }
+  OPTIONAL { ?e rdfs:label   ?n2 }
+}
+LIMIT 100
+"""
 
 def _escape_for_sparql(s: str) -> str:
     return s.replace("\\", "\\\\").replace('"', '\\"')
@@ -90,16 +91,22 @@ def label_search(endpoint_url: str, question: str, hints: List[str] = None) -> d
 
     # Strategy 1: label/name
     sparql1 = LABEL_OR_NAME_SEARCH % {"q": q_lit, "ADTO": ADTO_NS}
-    data1 = _post(endpoint_url, sparql1)
+    data1 = select(endpoint_url, sparql1)
     if "error" in data1:
         return {"error": data1["error"]}
     cand1 = _to_candidates(data1)
     if cand1:
         return {"candidates": cand1}
 
-    # Strategy 2: class-instance fallback
-    sparql2 = CLASS_INSTANCE_FALLBACK % {"q": q_lit, "ADTO": ADTO_NS}
-    data2 = _post(endpoint_url, sparql2)
+    # Strategy 2: class-instance fallback (classes from the cached schema index when it has a match)
+    index = schema_cache.index(endpoint_url)
+    classes = index.classes_matching(q) if index is not None else []
+    if classes:
+        rows = " ".join(f'(<{c}> "{_escape_for_sparql(index.classes[c])}")' for c in classes)
+        sparql2 = CLASS_INSTANCE_VALUES % {"classes": rows, "ADTO": ADTO_NS}
+    else:
+        sparql2 = CLASS_INSTANCE_FALLBACK % {"q": q_lit, "ADTO": ADTO_NS}
+    data2 = select(endpoint_url, sparql2)
     if "error" in data2:
         return {"error": data2["error"]}
     cand2 = _to_candidates(data2)
@@ -0,0 +1,174 @@
+# relation_index.py
+# Materialized per-entity predicate/direction/degree table behind get_relations. The
+# first use on an endpoint builds it with one aggregate pass over the graph; entries are
+# stamped with the KG version: the triple count plus an epoch that rolls over every
+# POG_RELATION_MAX_AGE seconds. The count is one cheap aggregate, checked on a background
+# thread at most every POG_RELATION_TTL seconds (only the first use waits for it), and
+# catches inserts and deletes. Count-neutral edits (<A> p x moved to <B> p x, p1
+# rewritten to p2) do not change it; the epoch bounds how long such an edit can be
+# served stale. A content checksum would catch them at once but is a full scan of every
+# triple on each check, which costs more than the lookups it protects.
+# After the version moves on, only the entities that are asked about are recomputed, in
+# one batched VALUES query, so a lookup never rescans a hub's edges more than once per
+# KG version. If the full build fails, lookups fall back to the per-entity query and the
+# build is retried after POG_RELATION_BUILD_BACKOFF.
+import os, time, logging, threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from sparql_client import select, resolve_endpoint
+
+TTL        = float(os.getenv("POG_RELATION_TTL", "300"))         # seconds between background count checks
+MAX_AGE    = float(os.getenv("POG_RELATION_MAX_AGE", "3600"))    # seconds an entry is trusted without a count change
+FULL_BUILD = os.getenv("POG_RELATION_FULL_BUILD", "1") == "1"    # 0: only ever compute requested entities
+BACKOFF    = float(os.getenv("POG_RELATION_BUILD_BACKOFF", "300"))  # seconds before retrying a failed full build
+CHUNK      = int(os.getenv("POG_VALUES_CHUNK", "50"))            # entities per VALUES block
+
+log = logging.getLogger("pog.relations")
+
+VERSION_QUERY = "SELECT (COUNT(*) AS ?n) WHERE { ?s ?p ?o }"
+
+DEGREES_ALL = """
+SELECT ?e ?p ?dir (COUNT(*) AS ?count) WHERE {
+  { ?e ?p ?o BIND("out" AS ?dir) } UNION { ?s ?p ?e BIND("in" AS ?dir) }
+  FILTER(isIRI(?e))
+}
+GROUP BY ?e ?p ?dir
+"""
+
+DEGREES_FOR = """
+SELECT ?e ?p ?dir (COUNT(*) AS ?count) WHERE {
+  VALUES ?e { %s }
+  { ?e ?p ?o BIND("out" AS ?dir) } UNION { ?s ?p ?e BIND("in" AS ?dir) }
+}
+GROUP BY ?e ?p ?dir
+"""
+
+class _Index:
+    def __init__(self):
+        self.version: Optional[str] = None       # latest triple count seen
+        self.checked = 0.0
+        self.checking = False                    # a background version check is running
+        self.built: Optional[str] = None         # version of the last full build (absent entity = no edges)
+        self.building = False
+        self.retry_at = 0.0                      # monotonic time before which a failed full build is not retried
+        self.entries: Dict[str, Tuple[str, Dict[str, List[int]]]] = {}   # iri -> (version, {p: [out, in]})
+
+_indexes: Dict[str, _Index] = {}
+_lock = threading.Lock()
+
+def _rows(data: Dict[str, Any]):
+    for b in data.get("results", {}).get("bindings", []):
+        e, p, d = (b.get(k, {}).get("value") for k in ("e", "p", "dir"))
+        try:
+            n = int(float(b.get("count", {}).get("value", 0)))
+        except (TypeError, ValueError):
+            n = 0
+        if e and p:
+            yield e, p, 0 if d == "out" else 1, n
+
+def _fill(target: Dict[str, Dict[str, List[int]]], data: Dict[str, Any]):
+    for e, p, d, n in _rows(data):
+        target.setdefault(e, {}).setdefault(p, [0, 0])[d] += n
+
+def _fetch_version(endpoint: str) -> Tuple[Optional[str], str]:
+    data = select(endpoint, VERSION_QUERY)
+    if "error" in data:
+        return None, data["error"]
+    rows = data.get("results", {}).get("bindings", [])
+    return rows[0].get("n", {}).get("value", "") if rows else "", ""
+
+def _versioned(count: str) -> str:
+    return f"{count}:{int(time.time() // MAX_AGE) if MAX_AGE > 0 else 0}"
+
+def _refresh_version(endpoint: str, idx: _Index):
+    version, err = _fetch_version(endpoint)
+    with _lock:
+        if err:
+            log.warning("relation index version check failed for %s: %s", endpoint, err)
+        else:
+            idx.version = version
+        idx.checked = time.monotonic()           # failed checks also wait a TTL before the next try
+        idx.checking = False
+
+def _current_version(endpoint: str, idx: _Index) -> Tuple[Optional[str], str]:
+    """The last known version; only the first call on an endpoint waits for the count."""
+    with _lock:
+        version = idx.version
+        stale = version is not None and not idx.checking and time.monotonic() - idx.checked >= TTL
+        if stale:
+            idx.checking = True
+    if stale:
+        threading.Thread(target=_refresh_version, args=(endpoint, idx), daemon=True,
+                         name="pog-relation-version").start()
+    if version is not None:
+        return _versioned(version), ""
+    version, err = _fetch_version(endpoint)
+    if err:
+        return None, err
+    with _lock:
+        if idx.version is None:
+            idx.version, idx.checked = version, time.monotonic()
+        return _versioned(idx.version), ""
+
+def _full_build(endpoint: str, idx: _Index, version: str):
+    """One aggregate pass; on failure leave the index to per-entity queries until the backoff ends."""
+    data = select(endpoint, DEGREES_ALL)
+    with _lock:
+        idx.building = False
+        if "error" in data:
+            idx.retry_at = time.monotonic() + BACKOFF
+            log.warning("relation index full build failed for %s (retry in %.0f s): %s",
+                        endpoint, BACKOFF, data["error"])
+            return
+    table: Dict[str, Dict[str, List[int]]] = {}
+    _fill(table, data)
+    entries = {e: (version, preds) for e, preds in table.items()}
+    with _lock:
+        # keep per-entity results for the same version that landed while the build ran
+        entries.update((e, entry) for e, entry in idx.entries.items() if entry[0] == version and e not in entries)
+        idx.entries = entries
+        idx.built = version
+
+def degrees(endpoint_url: Optional[str], entities: List[str]) -> Tuple[Dict[str, Dict[str, List[int]]], str]:
+    """({iri: {predicate: [out, in]}}, error) for each requested entity."""
+    endpoint = resolve_endpoint(endpoint_url)
+    if not endpoint:
+        return {}, "Missing endpoint_url (and FUSEKI_ENDPOINT not set)"
+    with _lock:
+        idx = _indexes.setdefault(endpoint, _Index())
+    version, err = _current_version(endpoint, idx)
+    if err:
+        return {}, err
+
+    with _lock:
+        build = FULL_BUILD and idx.built is None and not idx.building and time.monotonic() >= idx.retry_at
+        if build:
+            idx.building = True
+    if build:
+        _full_build(endpoint, idx, version)
+
+    def fresh(e: str) -> bool:
+        entry = idx.entries.get(e)
+        return entry[0] == version if entry is not None else idx.built == version
+
+    with _lock:
+        stale = [e for e in dict.fromkeys(entities) if not fresh(e)]
+    for i in range(0, len(stale), CHUNK):
+        chunk = stale[i:i + CHUNK]
+        data = select(endpoint, DEGREES_FOR % " ".join(f"<{e}>" for e in chunk))
+        if "error" in data:
+            return {}, data["error"]
+        table = {e: {} for e in chunk}
+        _fill(table, data)
+        with _lock:
+            for e, preds in table.items():
+                idx.entries[e] = (version, preds)
+
+    with _lock:
+        return {e: idx.entries[e][1] if e in idx.entries else {} for e in entities}, ""
+
+def relations(preds: Dict[str, List[int]]) -> List[Dict[str, Any]]:
+    """get_relations' shape: [{"iri", "count", "out", "in"}] by descending total count."""
+    rels = [{"iri": p, "count": o + i, "out": o, "in": i} for p, (o, i) in preds.items()]
+    rels.sort(key=lambda r: (-r["count"], r["iri"]))
+    return rels
@@ -1,8 +1,8 @@
 from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
-import os
-import requests
 from typing import Any, Dict
 
+from sparql_client import post, resolve_endpoint
+
 @tool(
     name="run_sparql_query",
     description="Execute a SPARQL query on a Fuseki endpoint and return JSON results.",
@@ -15,19 +15,14 @@ def run_sparql_query(endpoint_url: str, query: str) -> Dict[str, Any]:
       {"results": {...}} on success, or {"error": "..."} on failure.
     """
     # Fallback to env if endpoint_url not provided
-    endpoint = (endpoint_url or os.getenv("FUSEKI_ENDPOINT", "")).strip()
+    endpoint = resolve_endpoint(endpoint_url)
 
     if not endpoint:
         return {"error": "Missing endpoint_url (and FUSEKI_ENDPOINT not set)"}
 
-    headers = {
-        "Accept": "application/sparql-results+json",
-        "Content-Type": "application/sparql-query",
-        "User-Agent": "pog-tools/1.0"
-    }
-
     try:
-        resp = requests.post(endpoint, data=query.encode("utf-8"), headers=headers, timeout=60)
+        # pooled session from sparql_client (keep-alive, gzip, retries)
+        resp = post(endpoint, query)
         if resp.status_code >= 400:
             return {"error": f"HTTP {resp.status_code}: {resp.text[:500]}"}
 
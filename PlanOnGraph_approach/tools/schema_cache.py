@@ -0,0 +1,224 @@
+# schema_cache.py
+# Ontology schema cache shared by get_schema, check_schema and label_search. Entries are
+# keyed on (endpoint, schema version); the version is a fingerprint of the ontology
+# (owl:versionInfo, class/property/axiom counts and a checksum over the property types,
+# domains, ranges and labels and the class labels) that is re-checked at most every
+# POG_SCHEMA_TTL seconds, so repeat questions cost no round-trips. Each (endpoint,
+# version) gets a compact SchemaIndex built once: class labels and properties with
+# domain/range.
+import os, json, time, hashlib, threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sparql_client import select, resolve_endpoint
+
+TTL       = float(os.getenv("POG_SCHEMA_TTL", "300"))   # seconds between fingerprint checks
+CACHE_DIR = os.getenv("POG_SCHEMA_CACHE_DIR", "")       # optional on-disk copy for short-lived tool processes
+
+SCHEMA_CLASS_QUERY = """
+PREFIX owl:  <http://www.w3.org/2002/07/owl#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+SELECT ?cls (SAMPLE(?lbl) AS ?label) (SAMPLE(?en) AS ?search_label)
+WHERE {
+  ?cls a owl:Class .
+  OPTIONAL { ?cls rdfs:label ?lbl }
+  OPTIONAL { ?cls rdfs:label ?en FILTER(LANGMATCHES(LANG(?en), 'en') || LANG(?en) = '') }
+}
+GROUP BY ?cls
+"""
+
+SCHEMA_PROP_QUERY = """
+PREFIX owl:  <http://www.w3.org/2002/07/owl#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+SELECT ?p ?type ?domain ?range (SAMPLE(?lbl) AS ?label)
+WHERE {
+  VALUES ?type { owl:ObjectProperty owl:DatatypeProperty }
+  ?p a ?type .
+  OPTIONAL { ?p rdfs:domain ?domain }
+  OPTIONAL { ?p rdfs:range  ?range }
+  OPTIONAL { ?p rdfs:label  ?lbl }
+}
+GROUP BY ?p ?type ?domain ?range
+"""
+
+# Cheap change detector: no GROUP BY, one row back. Counts alone miss an edited domain,
+# range or label, so every schema row also adds "1" + the decimal digits of the first 16
+# hex chars of its MD5 to an order-independent sum (as in relation_index.VERSION_QUERY).
+FINGERPRINT_QUERY = """
+PREFIX owl:  <http://www.w3.org/2002/07/owl#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX xsd:  <http://www.w3.org/2001/XMLSchema#>
+SELECT (SAMPLE(?ver) AS ?version) (COUNT(DISTINCT ?c) AS ?classes) (COUNT(DISTINCT ?p) AS ?props)
+       (COUNT(?ax) AS ?axioms) (SUM(?h) AS ?checksum)
+WHERE {
+  { { ?o a owl:Ontology . OPTIONAL { ?o owl:versionInfo ?ver } }
+    UNION { ?c a owl:Class }
+    UNION { VALUES ?t { owl:ObjectProperty owl:DatatypeProperty } ?p a ?t
+            BIND(CONCAT(STR(?p), " a ", STR(?t)) AS ?row) }
+    UNION { VALUES ?t { owl:ObjectProperty owl:DatatypeProperty } ?x a ?t ; ?ap ?ax
+            VALUES ?ap { rdfs:domain rdfs:range rdfs:label }
+            BIND(CONCAT(STR(?x), " ", STR(?ap), " ", IF(isBlank(?ax), "_", STR(?ax)), "@",
+                   IF(isLiteral(?ax), LANG(?ax), "")) AS ?row) }
+    UNION { ?lc a owl:Class ; rdfs:label ?cl
+            BIND(CONCAT(STR(?lc), " label ", STR(?cl), "@", LANG(?cl)) AS ?row) } }
+  BIND(IF(BOUND(?row), xsd:integer(CONCAT("1", REPLACE(SUBSTR(MD5(?row), 1, 16), "[a-f]", ""))), 0) AS ?h)
+}
+"""
+
+def _value(b: Dict[str, Any], key: str) -> Optional[str]:
+    return b.get(key, {}).get("value") if key in b else None
+
+def _search_label(b: Dict[str, Any]) -> Optional[str]:
+    """An English or untagged class label (label_search's language filter), else None."""
+    if "search_label" in b:
+        return _value(b, "search_label")
+    lang = b.get("label", {}).get("xml:lang", "")          # payloads cached before search_label
+    return _value(b, "label") if not lang or lang.lower().split("-")[0] == "en" else None
+
+class SchemaIndex:
+    """Compact lookup structures over one schema version."""
+    __slots__ = ("version", "classes", "properties")
+
+    def __init__(self, version: Optional[str] = None):
+        self.version = version
+        self.classes: Dict[str, Optional[str]] = {}              # class iri -> English/untagged label
+        self.properties: Dict[str, Dict[str, Any]] = {}          # iri -> {type, domains, ranges, label}
+
+    def _add_property(self, iri: str, ptype, domain, rng, label):
+        meta = self.properties.setdefault(iri, {"type": ptype, "domains": [], "ranges": [], "label": label})
+        if domain and domain not in meta["domains"]:
+            meta["domains"].append(domain)
+        if rng and rng not in meta["ranges"]:
+            meta["ranges"].append(rng)
+        meta["label"] = meta["label"] or label
+
+    @classmethod
+    def from_schema(cls, schema: Dict[str, Any], version: Optional[str] = None) -> "SchemaIndex":
+        """Build from get_schema output: raw SPARQL JSON or normalized lists of {"iri", ...}."""
+        idx = cls(version)
+        classes, props = schema.get("classes"), schema.get("properties")
+        if isinstance(classes, dict) and "results" in classes:
+            for b in classes.get("results", {}).get("bindings", []):
+                if _value(b, "cls"):
+                    idx.classes[_value(b, "cls")] = _search_label(b)
+        elif isinstance(classes, list):
+            for c in classes:
+                if isinstance(c, dict) and c.get("iri"):
+                    idx.classes[c["iri"]] = c.get("label")
+        if isinstance(props, dict) and "results" in props:
+            for b in props.get("results", {}).get("bindings", []):
+                if _value(b, "p"):
+                    idx._add_property(_value(b, "p"), _value(b, "type"), _value(b, "domain"),
+                                      _value(b, "range"), _value(b, "label"))
+        elif isinstance(props, list):
+            for p in props:
+                if isinstance(p, dict) and p.get("iri"):
+                    idx._add_property(p["iri"], p.get("type"), p.get("domain"), p.get("range"), p.get("label"))
+        return idx
+
+    def classes_matching(self, text: str) -> List[str]:
+        """Class IRIs whose label contains `text` (case-insensitive)."""
+        t = text.lower()
+        return [iri for iri, label in self.classes.items() if label and t in label.lower()]
+
+# ---------- Cache ----------
+_entries: Dict[str, Dict[str, Any]] = {}        # endpoint -> {version, checked, classes, properties}
+_indexes: Dict[Tuple[str, str], SchemaIndex] = {}   # (endpoint, version) -> index
+_lock = threading.Lock()
+
+def _fingerprint(endpoint: str) -> Tuple[Optional[str], Optional[str]]:
+    data = select(endpoint, FINGERPRINT_QUERY)
+    if "error" in data:
+        return None, data["error"]
+    rows = data.get("results", {}).get("bindings", [])
+    row = rows[0] if rows else {}
+    parts = [_value(row, k) or "" for k in ("version", "classes", "props", "axioms", "checksum")]
+    return "v-" + hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:12], None
+
+def _disk_path(endpoint: str, version: str) -> Optional[Path]:
+    if not CACHE_DIR:
+        return None
+    return Path(CACHE_DIR) / f"schema_{hashlib.sha1(endpoint.encode('utf-8')).hexdigest()[:8]}_{version}.json"
+
+def _read_disk(endpoint: str, version: str) -> Optional[Dict[str, Any]]:
+    path = _disk_path(endpoint, version)
+    if path is None or not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def _write_disk(endpoint: str, version: str, schema: Dict[str, Any]):
+    path = _disk_path(endpoint, version)
+    if path is not None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(schema), encoding="utf-8")
+            tmp.replace(path)
+        except OSError:
+            pass                                 # the disk copy is only an optimization
+
+def get(endpoint_url: Optional[str]) -> Dict[str, Any]:
+    """{"classes", "properties", "schema_version", "schema_endpoint"} (get_schema's contract) or {"error": ...}."""
+    endpoint = resolve_endpoint(endpoint_url)
+    if not endpoint:
+        return {"error": "Missing endpoint_url (and FUSEKI_ENDPOINT not set)"}
+    with _lock:
+        entry = _entries.get(endpoint)
+    now = time.monotonic()
+    if entry is not None and now - entry["checked"] < TTL:
+        return _public(entry)
+
+    version, err = _fingerprint(endpoint)
+    if err:
+        return _public(entry) if entry is not None else {"error": err}    # serve stale rather than fail
+    if entry is not None and entry["version"] == version:
+        with _lock:
+            entry["checked"] = now
+        return _public(entry)
+
+    schema = _read_disk(endpoint, version)
+    if schema is None:
+        classes = select(endpoint, SCHEMA_CLASS_QUERY)
+        if "error" in classes:
+            return {"error": classes["error"]}
+        props = select(endpoint, SCHEMA_PROP_QUERY)
+        if "error" in props:
+            return {"error": props["error"]}
+        schema = {"classes": classes, "properties": props}
+        _write_disk(endpoint, version, schema)
+    entry = {"endpoint": endpoint, "version": version, "checked": now, **schema}
+    with _lock:
+        _entries[endpoint] = entry
+        if (endpoint, version) not in _indexes:
+            _indexes[(endpoint, version)] = SchemaIndex.from_schema(schema, version)
+    return _public(entry)
+
+def _public(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {"classes": entry["classes"], "properties": entry["properties"],
+            "schema_version": entry["version"], "schema_endpoint": entry["endpoint"]}
+
+def index(endpoint_url: Optional[str]) -> Optional[SchemaIndex]:
+    """The index for an endpoint's current schema (None if it cannot be fetched)."""
+    schema = get(endpoint_url)
+    if "error" in schema:
+        return None
+    with _lock:
+        return _indexes.get((schema["schema_endpoint"], schema["schema_version"]))
+
+def index_for(schema: Dict[str, Any]) -> SchemaIndex:
+    """Index for a get_schema payload handed back by an agent. The cached one for its
+    (endpoint, version) is reused only while the payload still matches what was served."""
+    if not isinstance(schema, dict):
+        return SchemaIndex.from_schema({})
+    version = schema.get("schema_version")
+    key = (schema.get("schema_endpoint"), version)
+    with _lock:
+        idx = _indexes.get(key)
+        entry = _entries.get(key[0])
+    if (idx is not None and entry is not None and entry["version"] == version
+            and schema.get("classes") == entry["classes"] and schema.get("properties") == entry["properties"]):
+        return idx
+    return SchemaIndex.from_schema(schema, version)
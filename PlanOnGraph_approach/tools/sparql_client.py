@@ -0,0 +1,101 @@
+# sparql_client.py
+# Shared SPARQL-over-HTTP client for the PoG tools: one pooled keep-alive session per
+# endpoint (so repeated tool calls reuse TLS connections), gzip responses, bounded
+# retries with backoff on connect errors / 429 / 502-504 (not read timeouts), and per-call
+# accounting.
+# Import the tools with this folder as the package root so the module is bundled.
+import os, time, threading, logging
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TIMEOUT   = float(os.getenv("POG_SPARQL_TIMEOUT", "60"))    # seconds per attempt
+RETRIES   = int(os.getenv("POG_SPARQL_RETRIES", "3"))       # extra attempts after the first
+BACKOFF   = float(os.getenv("POG_SPARQL_BACKOFF", "0.3"))   # sleeps 0.3, 0.6, 1.2 ... between attempts
+POOL_SIZE = int(os.getenv("POG_SPARQL_POOL", "10"))         # keep-alive connections per endpoint
+
+SELECT_HEADERS = {
+    "Accept": "application/sparql-results+json",
+    "Content-Type": "application/sparql-query",
+}
+
+log = logging.getLogger("pog.sparql")
+_sessions: Dict[str, requests.Session] = {}
+_stats: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+def resolve_endpoint(endpoint: Optional[str]) -> str:
+    return (endpoint or os.getenv("FUSEKI_ENDPOINT", "")).strip()
+
+def session(endpoint: str) -> requests.Session:
+    with _lock:
+        s = _sessions.get(endpoint)
+        if s is None:
+            # queries are reads, so POST is safe to retry; read timeouts are not retried (a slow
+            # query would block for (RETRIES + 1) * TIMEOUT and re-run on a busy endpoint)
+            retry = Retry(total=RETRIES, read=0, backoff_factor=BACKOFF, status_forcelist=(429, 502, 503, 504),
+                          allowed_methods=frozenset({"GET", "POST"}), raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+            s = requests.Session()
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "pog-tools/1.0"})
+            _sessions[endpoint] = s
+        return s
+
+def _account(endpoint: str, seconds: float, resp: Optional[requests.Response]):
+    with _lock:
+        st = _stats.setdefault(endpoint, {"calls": 0, "errors": 0, "retries": 0, "seconds": 0.0,
+                                          "bytes": 0, "wire_bytes": 0})
+        st["calls"] += 1
+        st["seconds"] += seconds
+        if resp is None or resp.status_code >= 400:
+            st["errors"] += 1
+        if resp is not None:
+            body = len(resp.content)
+            st["bytes"] += body
+            st["wire_bytes"] += int(resp.headers.get("Content-Length") or body)
+            history = getattr(resp.raw, "retries", None)
+            st["retries"] += len(history.history) if history is not None else 0
+    log.debug("sparql %s %.1f ms %s bytes", endpoint, seconds * 1000,
+              len(resp.content) if resp is not None else "-")
+
+def post(endpoint: str, query: str, headers: Optional[Dict[str, str]] = None,
+         timeout: float = TIMEOUT) -> requests.Response:
+    """POST a query; raises requests.RequestException once retries are exhausted."""
+    t0 = time.perf_counter()
+    resp = None
+    try:
+        resp = session(endpoint).post(endpoint, data=query.encode("utf-8"),
+                                      headers=headers or SELECT_HEADERS, timeout=timeout)
+        resp.content                                      # read the body inside the timing
+        return resp
+    finally:
+        _account(endpoint, time.perf_counter() - t0, resp)
+
+def select(endpoint: Optional[str], query: str) -> Dict[str, Any]:
+    """SPARQL JSON results, or {"error": "..."} (the contract the tools return to agents)."""
+    endpoint = resolve_endpoint(endpoint)
+    if not endpoint:
+        return {"error": "Missing endpoint_url (and FUSEKI_ENDPOINT not set)"}
+    try:
+        resp = post(endpoint, query)
+    except requests.RequestException as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    if resp.status_code >= 400:
+        return {"error": f"HTTP {resp.status_code}: {resp.text[:500]}"}
+    try:
+        return resp.json()
+    except ValueError:
+        return {"error": f"Non-JSON response: {resp.text[:500]}"}
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Per-endpoint totals since start (or reset_stats): calls, errors, retries, seconds, bytes."""
+    with _lock:
+        return {ep: {**st, "seconds": round(st["seconds"], 3)} for ep, st in _stats.items()}
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
@@ -1,20 +1,52 @@
 from ibm_watsonx_orchestrate.agent_builder.tools import tool, ToolPermission
+import time
+from typing import Optional
 import requests
 
 ROAD_REPORT_API = "https://2e5b79924ef6.ngrok-free.app"  # <-- string in quotes
+POLL_SECONDS    = 2
+MAX_WAIT_S      = 170   # stay under the tool's overall budget (submit + every poll)
+REQUEST_TIMEOUT = 30    # per HTTP call, capped at the time left before the deadline
 
 @tool(
     name="get_roadsegment_report_link",
-    description="Generate the RoadSegment length PDF and return a public URL.",
+    description="Generate the RoadSegment length PDF and return a public URL (pass job_id from a pending answer to resume).",
     permission=ToolPermission.READ_ONLY  # READ_ONLY is sufficient
 )
-def get_roadsegment_report_link() -> dict:
-    """Calls POST /report on the road report API and returns the link."""
+def get_roadsegment_report_link(job_id: Optional[str] = None) -> dict:
+    """
+    Submits a report job on the road report API, polls it and returns the link.
+    :param job_id: job_id from an earlier "pending" answer; resumes polling that job
+                   instead of submitting a new one
+    :return: {"status": "ok", "url": ...}, {"status": "pending", "job_id": ...} (call again
+             with that job_id) or {"status": "error", "detail": ...}
+    """
+    deadline = time.monotonic() + MAX_WAIT_S
+    def time_left() -> float:
+        return deadline - time.monotonic()
+
     try:
-        r = requests.post(f"{ROAD_REPORT_API}/report", timeout=180)
-        if r.status_code >= 400:
-            return {"status": "error", "detail": r.text}
-        data = r.json()
-        return {"status": "ok", "url": data.get("url")}
+        if not job_id:
+            r = requests.post(f"{ROAD_REPORT_API}/reports/roadsegments/jobs", json={},
+                              timeout=min(REQUEST_TIMEOUT, time_left()))
+            if r.status_code >= 400:
+                return {"status": "error", "detail": r.text}
+            job_id = r.json().get("job_id")
+
+        while time_left() > 1:
+            r = requests.get(f"{ROAD_REPORT_API}/reports/jobs/{job_id}/result",
+                             timeout=min(REQUEST_TIMEOUT, time_left()))
+            if r.status_code >= 400:
+                return {"status": "error", "detail": r.text}
+            if r.status_code == 200:
+                return {"status": "ok", "url": r.json().get("url")}
+            time.sleep(max(0.0, min(POLL_SECONDS, time_left() - 1)))
+        return {"status": "pending", "job_id": job_id,
+                "detail": "Report is still being generated; try again shortly."}
+    except requests.Timeout:
+        if job_id is None:
+            return {"status": "error", "detail": "Timed out submitting the report job"}
+        return {"status": "pending", "job_id": job_id,
+                "detail": "Report is still being generated; try again shortly."}
     except Exception as e:
         return {"status": "error", "detail": str(e)}
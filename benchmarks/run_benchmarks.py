@@ -0,0 +1,244 @@
+# run_benchmarks.py
+# End-to-end benchmarks over synthetic ADTO cities served by the stub endpoint.
+#
+#   python -m benchmarks.run_benchmarks --sizes 100,1000,10000 --out bench.json
+#   python -m benchmarks.run_benchmarks --sizes 100,1000,10000 --baseline bench.json   # exit 1 on regression
+#
+# Each size gets a fresh stub endpoint. The report pipeline runs stage by stage in a
+# fresh worker process (twice: once for wall time, once under tracemalloc for each
+# stage's peak Python-heap allocation, which includes numpy buffers but not GEOS/PROJ
+# internals). The proxy suite runs fuseki_proxy under uvicorn against the same stub
+# and compares it with hitting the stub directly; its memory is the process high-water mark.
+import argparse, gc, json, os, socket, statistics, subprocess, sys, tempfile, time, tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+SUPPORT_API = ROOT / "support_api"
+PROXY_SMALL_QUERIES = 50
+PROXY_CONCURRENCY = 8
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url}: process exited with {proc.returncode}")
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(url)
+
+def _peak_rss_mb(pid: int) -> Optional[float]:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None          # not Linux
+    return None
+
+def _record(suite: str, size: int, stage: str, seconds: float, peak_mb: Optional[float] = None, **extra) -> dict:
+    return {"suite": suite, "size": size, "stage": stage, "seconds": round(seconds, 4),
+            "peak_mb": peak_mb, **extra}
+
+# ---------- Report pipeline (worker process) ----------
+def _pipeline_stages(rr, workdir: Path) -> List[tuple]:
+    """(name, fn(ctx)) in pipeline order; later stages read what earlier ones put in ctx."""
+    def project(c):
+        c["proj"], c["crs"] = rr.project_to_meters(c["roads"])
+    def cold(c):
+        rr._segment_cache = rr.SegmentCache(workdir / f"segments_{time.time_ns()}.sqlite")
+        c["seg"], c["seg_crs"] = rr.project_segments(c["roads"])
+    def corridors(c):
+        c["per_segment"], c["pairs"] = rr.corridor_overlaps(c["seg"], c["seg_crs"], 5.0, c["layers"])
+    def pages(c):
+        c["specs"] = rr.report_pages(c["seg"], c["seg_crs"], c["pairs"], 5.0, "status", rr.LENGTH_MODE)
+    return [
+        ("fetch_roadsegments",    lambda c: c.update(roads=rr.fetch_roadsegments())),
+        ("parse_geometries",      lambda c: rr.parse_geometries(c["roads"]["wkt"], c["roads"]["geojson"])),
+        ("project_to_meters",     project),
+        ("lengths_m",             lambda c: rr.lengths_m(c["proj"]["geom_m"])),
+        ("length_m_scalar",       lambda c: [rr.length_m(g) for g in c["proj"]["geom_m"]]),
+        ("geodesic_lengths",      lambda c: rr.geodesic_lengths(c["proj"]["geom"])),
+        ("project_segments_cold", cold),
+        ("project_segments_warm", lambda c: rr.project_segments(c["roads"])),
+        ("fetch_corridor_layers", lambda c: c.update(layers=rr.fetch_corridor_layers())),
+        ("corridor_overlaps",     corridors),
+        ("report_pages",          pages),
+        ("render_pdf",            lambda c: rr.write_pages(workdir / "report.pdf", c["specs"], lambda *a: None,
+                                                           parallel=rr.RENDER_PROCS > 0)),
+    ]
+
+def _run_stages(stages, trace: bool) -> Dict[str, tuple]:
+    ctx, out = {}, {}
+    for name, fn in stages:
+        gc.collect()
+        if trace:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        fn(ctx)
+        dt = time.perf_counter() - t0
+        peak = round((tracemalloc.get_traced_memory()[1] - base) / 2**20, 1) if trace else None
+        out[name] = (dt, peak)
+    return out
+
+def pipeline_worker(endpoint: str, size: int, render_procs: int, trace: bool) -> List[dict]:
+    workdir = Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+    os.environ.update(SPARQL_ENDPOINT=endpoint, REPORT_DIR=str(workdir), SEGMENT_CACHE_DB="",
+                      REPORT_RENDER_PROCS=str(render_procs))
+    sys.path.insert(0, str(SUPPORT_API))
+    t0 = time.perf_counter()
+    import road_report_api as rr
+    records = [_record("pipeline", size, "import", time.perf_counter() - t0)]
+    t0 = time.perf_counter()
+    rr._load_stack()
+    records.append(_record("pipeline", size, "load_stack", time.perf_counter() - t0))
+
+    stages = _pipeline_stages(rr, workdir)
+    timed = _run_stages(stages, trace=False)
+    if trace:
+        tracemalloc.start()
+        traced = _run_stages(stages, trace=True)
+        tracemalloc.stop()
+    for name, _ in stages:
+        records.append(_record("pipeline", size, name, timed[name][0], traced[name][1] if trace else None))
+    records.append(_record("pipeline", size, "total", sum(dt for dt, _ in timed.values()),
+                           _peak_rss_mb(os.getpid())))
+    return records
+
+def run_pipeline(endpoint: str, size: int, render_procs: int, trace: bool) -> List[dict]:
+    cmd = [sys.executable, "-m", "benchmarks.run_benchmarks", "--worker", "pipeline", "--endpoint", endpoint,
+           "--sizes", str(size), "--render-procs", str(render_procs)] + ([] if trace else ["--no-memory"])
+    out = subprocess.run(cmd, cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+# ---------- Proxy ----------
+def _timed_post(url: str, **kwargs) -> tuple:
+    t0 = time.perf_counter()
+    r = requests.post(url, timeout=600, **kwargs)
+    r.raise_for_status()
+    return time.perf_counter() - t0, len(r.content)
+
+def run_proxy(stub_base: str, size: int, repeat: int) -> List[dict]:
+    sys.path.insert(0, str(SUPPORT_API))
+    import road_report_api as rr                      # query texts only (heavy stack stays unloaded)
+    big = rr.PREFIXES + rr.ROADSEGMENT_QUERY
+    small = rr.PREFIXES + rr.LAYER_QUERY % {"cls": "Zone"}
+
+    port = _free_port()
+    env = {**os.environ, "FUSEKI_BASE": stub_base}
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "fuseki_proxy:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=SUPPORT_API, env=env)
+    proxy = f"http://127.0.0.1:{port}"
+    records = []
+    try:
+        _wait_ready(f"{proxy}/health", proc)
+        direct = [_timed_post(f"{stub_base}/sparql", data=big.encode("utf-8"),
+                              headers={"Accept": "application/sparql-results+json",
+                                       "Content-Type": "application/sparql-query"}) for _ in range(repeat)]
+        via = [_timed_post(f"{proxy}/query", json={"query": big}) for _ in range(repeat)]
+        records.append(_record("proxy", size, "direct_select", statistics.median(d for d, _ in direct),
+                               bytes=direct[0][1]))
+        records.append(_record("proxy", size, "proxy_select", statistics.median(d for d, _ in via),
+                               bytes=via[0][1]))
+
+        lat = sorted(_timed_post(f"{proxy}/query", json={"query": small})[0] for _ in range(PROXY_SMALL_QUERIES))
+        records.append(_record("proxy", size, "small_query_p50", lat[len(lat) // 2]))
+        records.append(_record("proxy", size, "small_query_p95", lat[int(len(lat) * 0.95) - 1]))
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(PROXY_CONCURRENCY) as pool:
+            list(pool.map(lambda _: _timed_post(f"{proxy}/query", json={"query": small}), range(PROXY_SMALL_QUERIES)))
+        dt = time.perf_counter() - t0
+        records.append(_record("proxy", size, f"small_query_x{PROXY_CONCURRENCY}", dt,
+                               _peak_rss_mb(proc.pid), qps=round(PROXY_SMALL_QUERIES / dt, 1)))
+    finally:
+        proc.terminate()
+        proc.wait()
+    return records
+
+# ---------- Runner ----------
+def run_size(size: int, suites: List[str], args) -> List[dict]:
+    port = _free_port()
+    stub = subprocess.Popen([sys.executable, "-m", "benchmarks.stub_sparql", "--segments", str(size),
+                             "--seed", str(args.seed), "--port", str(port)], cwd=ROOT, stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}/ds"
+    records = []
+    try:
+        _wait_ready(f"{base}/health", stub)
+        if "pipeline" in suites:
+            records += run_pipeline(f"{base}/sparql", size, args.render_procs, not args.no_memory)
+        if "proxy" in suites:
+            records += run_proxy(base, size, args.repeat)
+    finally:
+        stub.terminate()
+        stub.wait()
+    return records
+
+def print_table(records: List[dict]):
+    print(f"{'suite':<9}{'size':>9}  {'stage':<24}{'seconds':>10}{'peak MB':>10}")
+    for r in records:
+        peak = "" if r["peak_mb"] is None else f"{r['peak_mb']:.1f}"
+        print(f"{r['suite']:<9}{r['size']:>9}  {r['stage']:<24}{r['seconds']:>10.4f}{peak:>10}")
+
+def regressions(records: List[dict], baseline: List[dict], tolerance: float, floor_s: float = 0.01) -> List[str]:
+    """Stages slower than baseline by more than `tolerance` (and by at least `floor_s`, to ignore noise)."""
+    old = {(r["suite"], r["size"], r["stage"]): r["seconds"] for r in baseline}
+    out = []
+    for r in records:
+        prev = old.get((r["suite"], r["size"], r["stage"]))
+        if prev is not None and r["seconds"] > prev * (1 + tolerance) and r["seconds"] - prev > floor_s:
+            out.append(f"{r['suite']}/{r['size']}/{r['stage']}: {prev:.4f}s -> {r['seconds']:.4f}s")
+    return out
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the report pipeline and the SPARQL proxy.")
+    ap.add_argument("--sizes", default="100,1000,10000", help="segment counts, e.g. 100,1000,10000,100000,1000000")
+    ap.add_argument("--suites", default="pipeline,proxy")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3, help="proxy: repetitions of the full listing")
+    ap.add_argument("--render-procs", type=int, default=0, help="render pool size (0 = in-process)")
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--out", help="write results as JSON")
+    ap.add_argument("--baseline", help="earlier --out file to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (fraction)")
+    ap.add_argument("--worker", choices=["pipeline"], help=argparse.SUPPRESS)
+    ap.add_argument("--endpoint", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    if args.worker == "pipeline":
+        print(json.dumps(pipeline_worker(args.endpoint, sizes[0], args.render_procs, not args.no_memory)))
+        return 0
+
+    suites = args.suites.split(",")
+    records = []
+    for size in sizes:
+        records += run_size(size, suites, args)
+    print_table(records)
+    if args.out:
+        meta = {"python": sys.version.split()[0], "cpus": os.cpu_count(), "seed": args.seed,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        Path(args.out).write_text(json.dumps({"meta": meta, "results": records}, indent=1), encoding="utf-8")
+    if args.baseline:
+        slow = regressions(records, json.loads(Path(args.baseline).read_text(encoding="utf-8"))["results"],
+                           args.tolerance)
+        for line in slow:
+            print("REGRESSION", line)
+        return 1 if slow else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# stub_sparql.py
+# Stand-in SPARQL endpoint for benchmarks. Serves a synthetic city (synthetic_city.py)
+# for the query shapes the services issue: RoadSegment listings and per-class layer
+# queries (Zone, WaterMain, ...). Result documents are rendered once to disk at
+# startup and then streamed, so the endpoint costs the same at 10^2 and 10^6 segments
+# and timings measure the client side. Anything else gets an empty result set.
+#
+#   python -m benchmarks.stub_sparql --segments 100000 --port 8799
+#   -> http://127.0.0.1:8799/ds/sparql  (also accepts /query, JSON {"query": ...} bodies, /update)
+import argparse, json, re, shutil, tempfile, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic_city import iter_segments, iter_zones, iter_water_mains
+
+WKT_TYPE = "http://www.opengis.net/ont/geosparql#wktLiteral"
+_CLASS = re.compile(r"\ba\s+adto:(\w+)")
+
+def _uri(v): return {"type": "uri", "value": v}
+def _literal(v): return {"type": "literal", "value": v}
+
+def _segment_binding(row: dict) -> dict:
+    return {"s": _uri(row["iri"]), "name": _literal(row["name"]), "status": _literal(row["status"]),
+            "road_class": _literal(row["road_class"]),
+            "wkt": {"type": "literal", "datatype": WKT_TYPE, "value": row["wkt"]},
+            "geojson": _literal(row["geojson"])}
+
+def _layer_binding(row: dict) -> dict:
+    return {"s": _uri(row["iri"]), "label": _literal(row["label"]),
+            "wkt": {"type": "literal", "datatype": WKT_TYPE, "value": row["wkt"]},
+            "geojson": _literal(row["geojson"])}
+
+def _write_results(path: Path, variables, bindings):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write('{"head":{"vars":%s},"results":{"bindings":[' % json.dumps(variables))
+        for i, b in enumerate(bindings):
+            fh.write(("," if i else "") + "\n" + json.dumps(b, separators=(",", ":")))
+        fh.write("\n]}}")
+
+def render_city(out_dir: Path, n_segments: int, seed: int = 0) -> dict:
+    """Pre-render the result documents; returns class -> file."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files = {
+        "RoadSegment": (["s", "name", "status", "road_class", "wkt", "geojson"],
+                        map(_segment_binding, iter_segments(n_segments, seed))),
+        "Zone":        (["s", "label", "wkt", "geojson"], map(_layer_binding, iter_zones(n_segments, seed))),
+        "WaterMain":   (["s", "label", "wkt", "geojson"], map(_layer_binding, iter_water_mains(n_segments, seed))),
+    }
+    out = {}
+    for cls, (variables, bindings) in files.items():
+        out[cls] = out_dir / f"{cls}.srj"
+        _write_results(out[cls], variables, bindings)
+    empty = out_dir / "empty.srj"
+    empty.write_text('{"head":{"vars":[]},"results":{"bindings":[]}}', encoding="utf-8")
+    out[None] = empty
+    return out
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    files: dict = {}
+    counts = {"query": 0, "update": 0}
+    _lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, path: Path = None, body: bytes = b"", ctype="application/sparql-results+json"):
+        size = path.stat().st_size if path else len(body)
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        if path:
+            with open(path, "rb") as fh:
+                shutil.copyfileobj(fh, self.wfile, 1 << 16)
+        else:
+            self.wfile.write(body)
+
+    def _query_text(self) -> str:
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+        ctype = self.headers.get("Content-Type", "")
+        if ctype.startswith("application/json"):
+            return json.loads(raw).get("query", "")
+        if ctype.startswith("application/x-www-form-urlencoded"):
+            form = parse_qs(raw)
+            return (form.get("query") or form.get("update") or [""])[0]
+        return raw
+
+    def _answer(self, query: str):
+        with self._lock:
+            self.counts["query"] += 1
+        classes = _CLASS.findall(query)
+        cls = next((c for c in classes if c in self.files), None)
+        self._send(200, self.files[cls])
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/health"):
+            return self._send(200, body=json.dumps({"ok": True, **self.counts}).encode(), ctype="application/json")
+        q = parse_qs(url.query).get("query")
+        if not q:
+            return self._send(400, body=b"missing query", ctype="text/plain")
+        self._answer(q[0])
+
+    def do_POST(self):
+        text = self._query_text()
+        if self.path.rstrip("/").endswith("/update"):
+            with self._lock:
+                self.counts["update"] += 1
+            return self._send(204)
+        self._answer(text)
+
+def serve(port: int, n_segments: int, seed: int = 0, data_dir: str = None) -> ThreadingHTTPServer:
+    StubHandler.files = render_city(Path(data_dir or tempfile.mkdtemp(prefix="stub_city_")), n_segments, seed)
+    return ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve a synthetic ADTO city as a SPARQL endpoint.")
+    ap.add_argument("--segments", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--port", type=int, default=8799)
+    ap.add_argument("--data-dir", default=None)
+    args = ap.parse_args()
+    server = serve(args.port, args.segments, args.seed, args.data_dir)
+    print(f"stub SPARQL endpoint on http://127.0.0.1:{args.port}/ds/sparql ({args.segments} segments)", flush=True)
+    server.serve_forever()
@@ -0,0 +1,145 @@
+# synthetic_city.py
+# Synthetic ADTO cities shaped like "Knowledge Graph/adto_city_data.ttl": Roads made
+# of RoadSegments (geo:asWKT + adto:asGeoJSON geometries), Zones and WaterMains.
+# The city is a grid of 2.4 km districts starting at Amaravati; each district has
+# 8 east-west + 8 north-south roads of 8 segments, one zone polygon and one water
+# main. Everything is generated per district from (seed, district) so any size can
+# be streamed without holding the city in memory.
+import argparse, json, math
+from typing import Iterator, Dict
+
+import numpy as np
+
+ADTO = "http://www.projectsynapse.com/ontologies/adto#"
+CRS84 = "<http://www.opengis.net/def/crs/OGC/1.3/CRS84> "
+ORIGIN = (80.40, 16.45)            # lon, lat of the first district (UTM 44N)
+DISTRICT_M = 2400.0
+ROADS_PER_AXIS = 8
+SEGS_PER_ROAD = 8
+SEGS_PER_DISTRICT = 2 * ROADS_PER_AXIS * SEGS_PER_ROAD
+
+ROAD_CLASSES = ["Arterial Road", "Major Arterial Roads", "Sub Arterial Road", "Collector Road", "Local Road"]
+STATUSES = ["Completed", "Maintenance", "Under Construction", "Planned"]
+
+def n_districts(n_segments: int) -> int:
+    return max(1, math.ceil(n_segments / SEGS_PER_DISTRICT))
+
+def _grid_side(n_segments: int) -> int:
+    return math.ceil(math.sqrt(n_districts(n_segments)))
+
+def _to_lonlat(x_m: np.ndarray, y_m: np.ndarray):
+    lat = ORIGIN[1] + y_m / 111320.0
+    lon = ORIGIN[0] + x_m / (111320.0 * math.cos(math.radians(ORIGIN[1])))
+    return lon, lat
+
+def _district_origin(d: int, side: int):
+    return (d % side) * DISTRICT_M, (d // side) * DISTRICT_M
+
+def _wkt(kind: str, coords) -> str:
+    pts = ", ".join(f"{x!r} {y!r}" for x, y in coords)
+    if kind == "LineString":
+        return f"{CRS84}LINESTRING({pts})"
+    return f"{CRS84}MULTIPOLYGON((({pts})))"
+
+def _geojson(kind: str, coords) -> str:
+    pts = [[x, y] for x, y in coords]
+    if kind == "LineString":
+        return json.dumps({"type": "LineString", "coordinates": pts}, separators=(",", ":"))
+    return json.dumps({"type": "MultiPolygon", "coordinates": [[pts]]}, separators=(",", ":"))
+
+# ---------- Features ----------
+def iter_segments(n_segments: int, seed: int = 0) -> Iterator[Dict[str, str]]:
+    """Exactly n_segments RoadSegment rows: iri, road, name, status, road_class, wkt, geojson."""
+    side = _grid_side(n_segments)
+    seg_len = DISTRICT_M / SEGS_PER_ROAD
+    spacing = DISTRICT_M / ROADS_PER_AXIS
+    emitted = 0
+    for d in range(n_districts(n_segments)):
+        rng = np.random.default_rng([seed, d])
+        ox, oy = _district_origin(d, side)
+        for r in range(2 * ROADS_PER_AXIS):
+            road = d * 2 * ROADS_PER_AXIS + r
+            road_class = ROAD_CLASSES[rng.integers(len(ROAD_CLASSES))]
+            offset = (r % ROADS_PER_AXIS + 0.5) * spacing
+            for k in range(SEGS_PER_ROAD):
+                if emitted == n_segments:
+                    return
+                nv = int(rng.integers(2, 5))                  # 2-4 vertices per segment
+                along = k * seg_len + np.linspace(0.0, seg_len, nv)
+                across = offset + np.r_[0.0, rng.normal(0.0, 8.0, nv - 2), 0.0]
+                x, y = (along, across) if r < ROADS_PER_AXIS else (across, along)
+                lon, lat = _to_lonlat(ox + x, oy + y)
+                coords = list(zip(lon.tolist(), lat.tolist()))
+                name = f"R{road}_{k + 1:02d}"
+                emitted += 1
+                yield {
+                    "iri": ADTO + name, "road": ADTO + f"R{road}", "name": name,
+                    "status": STATUSES[rng.integers(len(STATUSES))], "road_class": road_class,
+                    "wkt": _wkt("LineString", coords), "geojson": _geojson("LineString", coords),
+                }
+
+def iter_zones(n_segments: int, seed: int = 0) -> Iterator[Dict[str, str]]:
+    side = _grid_side(n_segments)
+    for d in range(n_districts(n_segments)):
+        ox, oy = _district_origin(d, side)
+        x = ox + np.array([60.0, DISTRICT_M - 60, DISTRICT_M - 60, 60.0, 60.0])
+        y = oy + np.array([60.0, 60.0, DISTRICT_M - 60, DISTRICT_M - 60, 60.0])
+        lon, lat = _to_lonlat(x, y)
+        coords = list(zip(lon.tolist(), lat.tolist()))
+        yield {"iri": ADTO + f"Z{d}", "label": f"Zone {d}",
+               "wkt": _wkt("MultiPolygon", coords), "geojson": _geojson("MultiPolygon", coords)}
+
+def iter_water_mains(n_segments: int, seed: int = 0) -> Iterator[Dict[str, str]]:
+    side = _grid_side(n_segments)
+    for d in range(n_districts(n_segments)):
+        rng = np.random.default_rng([seed, d, 1])
+        ox, oy = _district_origin(d, side)
+        y = np.linspace(0.0, DISTRICT_M, 6)
+        x = DISTRICT_M / 2 + rng.normal(0.0, 40.0, 6)        # between two N-S roads
+        lon, lat = _to_lonlat(ox + x, oy + y)
+        coords = list(zip(lon.tolist(), lat.tolist()))
+        yield {"iri": ADTO + f"Main{d}", "label": f"Main {d}",
+               "wkt": _wkt("LineString", coords), "geojson": _geojson("LineString", coords)}
+
+# ---------- Turtle ----------
+def _lit(s: str) -> str:
+    return json.dumps(s, ensure_ascii=False)      # JSON string escaping is valid Turtle
+
+def write_ttl(path: str, n_segments: int, seed: int = 0):
+    """Stream the city as Turtle in the same shape as adto_city_data.ttl."""
+    def geom(fh, iri, row):
+        fh.write(f"<{iri}_geom> a geo:Geometry ;\n"
+                 f"    geo:asWKT {_lit(row['wkt'])}^^geo:wktLiteral ;\n"
+                 f"    adto:asGeoJSON {_lit(row['geojson'])} .\n\n")
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("@prefix adto: <%s> .\n@prefix geo: <http://www.opengis.net/ont/geosparql#> .\n"
+                 "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n\n" % ADTO)
+        road, members, road_class = None, [], None
+        def flush():
+            if road:
+                segs = ",\n        ".join(f"<{m}>" for m in members)
+                fh.write(f"<{road}> a adto:Road ;\n    adto:hasRoadClass {_lit(road_class)} ;\n"
+                         f"    adto:hasRoadSegment {segs} .\n\n")
+        for row in iter_segments(n_segments, seed):
+            if row["road"] != road:
+                flush()
+                road, members, road_class = row["road"], [], row["road_class"]
+            members.append(row["iri"])
+            fh.write(f"<{row['iri']}> a adto:RoadSegment ;\n    adto:hasGeometry <{row['iri']}_geom> ;\n"
+                     f"    adto:hasName {_lit(row['name'])} ;\n    adto:hasStatus {_lit(row['status'])} .\n\n")
+            geom(fh, row["iri"], row)
+        flush()
+        for cls, rows in (("Zone", iter_zones(n_segments, seed)), ("WaterMain", iter_water_mains(n_segments, seed))):
+            for row in rows:
+                fh.write(f"<{row['iri']}> a adto:{cls} ;\n    rdfs:label {_lit(row['label'])} ;\n"
+                         f"    adto:hasGeometry <{row['iri']}_geom> .\n\n")
+                geom(fh, row["iri"], row)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Write a synthetic ADTO city as Turtle.")
+    ap.add_argument("--segments", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="synthetic_city.ttl")
+    args = ap.parse_args()
+    write_ttl(args.out, args.segments, args.seed)
+    print(f"wrote {args.out}: {args.segments} segments, {n_districts(args.segments)} zones/water mains")
@@ -1,19 +1,78 @@
 # file: fuseki_proxy.py
-from fastapi import FastAPI, HTTPException
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, FrozenSet, Tuple, AsyncIterator, Union, List
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from requests.auth import HTTPBasicAuth
-import requests, os
+import asyncio, httpx, json, os, re, time, hashlib
+
+import metrics
+from metrics import Counter, Histogram
 
 # ---- Configure these (or use env vars) ----
+ENGINE     = os.getenv("PROXY_ENGINE", "fuseki")   # "fuseki", or "local": in-process rdflib over LOCAL_TTL (local_sparql.py)
 FUSEKI     = os.getenv("FUSEKI_BASE", "https://40af5a14eaa8.ngrok-free.app/amaravati")
 FUSEKI_USER = os.getenv("FUSEKI_USER", "admin")
 FUSEKI_PASS = os.getenv("FUSEKI_PASS", "StrongPass123")
-AUTH = HTTPBasicAuth(FUSEKI_USER, FUSEKI_PASS)  # used for UPDATE; add to SELECT if needed
+AUTH = httpx.BasicAuth(FUSEKI_USER, FUSEKI_PASS)  # used for UPDATE; add to SELECT if needed
+
+# Upstream connection pool (one keep-alive client per process)
+POOL_SIZE       = int(os.getenv("PROXY_POOL_SIZE", "100"))       # max concurrent upstream connections
+POOL_KEEPALIVE  = int(os.getenv("PROXY_POOL_KEEPALIVE", "20"))   # idle connections kept open
+CONNECT_TIMEOUT = float(os.getenv("PROXY_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT    = float(os.getenv("PROXY_TIMEOUT", "60"))        # default per request; body may lower/raise it
+MAX_TIMEOUT     = float(os.getenv("PROXY_MAX_TIMEOUT", "300"))
+POOL_TIMEOUT    = float(os.getenv("PROXY_POOL_TIMEOUT", "10"))   # wait for a free connection before 503
+HTTP2           = os.getenv("PROXY_HTTP2", "0") == "1"           # needs the h2 package
+GZIP_MIN_BYTES  = int(os.getenv("PROXY_GZIP_MIN_BYTES", "1024")) # compress responses to clients above this
+STREAM_BUFFER_MB = float(os.getenv("PROXY_STREAM_BUFFER_MB", "4")) # larger results are streamed through, not buffered
+
+# Result cache
+CACHE_MB        = float(os.getenv("PROXY_CACHE_MB", "64"))       # 0 disables the cache
+CACHE_ENTRY_MB  = float(os.getenv("PROXY_CACHE_ENTRY_MB", "4"))  # larger results are not cached
+CACHE_TTL       = float(os.getenv("PROXY_CACHE_TTL", "0"))       # seconds; 0 = until evicted/invalidated
+CACHE_INVALIDATE = os.getenv("PROXY_CACHE_INVALIDATE", "flush")  # "flush" or "graph" on successful /update
+COALESCE        = os.getenv("PROXY_COALESCE", "1") == "1"        # identical concurrent reads share one upstream call
+
+# /query/batch
+BATCH_CONCURRENCY = int(os.getenv("PROXY_BATCH_CONCURRENCY", "8"))  # upstream calls in flight per batch (upper bound)
+BATCH_MAX         = int(os.getenv("PROXY_BATCH_MAX", "200"))        # queries per batch
+UPDATE_BATCH_MAX  = int(os.getenv("PROXY_UPDATE_BATCH_MAX", "1000")) # operations per /update/batch
+LOAD_TIMEOUT      = float(os.getenv("PROXY_LOAD_TIMEOUT", "1800"))  # default and ceiling (not PROXY_MAX_TIMEOUT) for /load read timeouts
 # -------------------------------------------
 
-app = FastAPI()
+_client: Optional[httpx.AsyncClient] = None
+_local = None
+if ENGINE == "local":
+    import local_sparql                                # needs rdflib
+    _local = local_sparql.from_env()
+
+def _get_client() -> httpx.AsyncClient:
+    # created lazily on the serving loop; upstream responses are requested gzip-encoded
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_KEEPALIVE),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT, pool=POOL_TIMEOUT),
+            http2=HTTP2,
+        )
+    return _client
+
+@asynccontextmanager
+async def _lifespan(_app):
+    if _local is not None:
+        await asyncio.to_thread(_local.reload)
+    yield
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+app = FastAPI(lifespan=_lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # set specific origins if you need credentials/cookies
@@ -21,58 +80,498 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES)
+
+# Prometheus-style /metrics; Server-Timing headers with METRICS_TIMING_HEADERS=1
+metrics.instrument(app, "fuseki_proxy")
+UPSTREAM_SECONDS   = Histogram("proxy_upstream_seconds", "Fuseki latency to response headers.", ("endpoint",))
+UPSTREAM_RESPONSES = Counter("proxy_upstream_responses_total", "Fuseki responses by status ('error' = no response).",
+                             ("endpoint", "status"))
+UPSTREAM_BYTES     = Counter("proxy_upstream_bytes_total", "Bytes received from Fuseki (on the wire).", ("endpoint",))
+CACHE_REQUESTS     = Counter("proxy_cache_requests_total", "Result cache lookups (hit, miss, bypass).", ("result",))
+CACHE_EVICTIONS    = Counter("proxy_cache_evictions_total", "Entries dropped by reason (lru, ttl, update).", ("reason",))
+COALESCED          = Counter("proxy_coalesced_requests_total", "Queries answered by another request's upstream call.")
+BATCH_QUERIES      = Histogram("proxy_batch_queries", "Queries per /query/batch request.",
+                               buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+LOAD_BYTES         = Counter("proxy_load_bytes_total", "RDF bytes streamed to the Graph Store endpoint.")
+STREAMED           = Counter("proxy_streamed_responses_total", "Query results streamed through (spill, passthrough).",
+                             ("mode",))
+
+# ---------- Result cache ----------
+# Keyed on a normalized query (comments and whitespace collapsed, PREFIX declarations
+# dropped and prefixed names expanded to full IRIs, so differently-prefixed spellings
+# of one query share an entry) plus the Accept type. Bodies are the upstream bytes.
+# All access happens on the event loop, so no locking is needed.
+_TOKEN = re.compile(r'''
+    (?P<str>"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\'
+           |"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<iri><[^<>"{}|^`\\\s]*>)
+  | (?P<comment>\#[^\n]*)
+  | (?P<ws>\s+)
+  | (?P<pname>(?:[A-Za-z](?:[\w.-]*[\w-])?)?:(?:[\w:%-](?:[\w.:%-]*[\w:%-])?)?)
+  | (?P<word>[\w?$]+)
+  | (?P<other>.)
+''', re.X | re.S)
+_GRAPH_REF = re.compile(r"\b(?:FROM(?:\s+NAMED)?|GRAPH|WITH|INTO)\s+<([^>]*)>", re.I)
+
+def normalize_query(q: str) -> str:
+    toks = [(m.lastgroup, m.group()) for m in _TOKEN.finditer(q)]
+    toks = [(k, v) for k, v in toks if k not in ("ws", "comment")]
+    prefixes: Dict[str, str] = {}
+    out, i = [], 0
+    while i < len(toks):
+        kind, val = toks[i]
+        if kind == "word" and val.upper() == "PREFIX" and i + 2 < len(toks) \
+                and toks[i + 1][0] == "pname" and toks[i + 2][0] == "iri":
+            prefixes[toks[i + 1][1].rstrip(":")] = toks[i + 2][1][1:-1]
+            i += 3
+            continue
+        if kind == "pname":
+            pfx, local = val.split(":", 1)
+            if pfx in prefixes:
+                val = f"<{prefixes[pfx]}{local}>"
+        out.append(val)
+        i += 1
+    return " ".join(out)
+
+def graphs_referenced(normalized: str) -> FrozenSet[str]:
+    """Named graphs a (normalized) query or update names; empty = default/union graph."""
+    return frozenset(_GRAPH_REF.findall(normalized))
+
+class ResultCache:
+    def __init__(self, max_bytes: int, max_entry_bytes: int, ttl: float):
+        self.max_bytes, self.max_entry_bytes, self.ttl = max_bytes, max_entry_bytes, ttl
+        self._entries: "OrderedDict[str, Tuple[bytes, str, FrozenSet[str], float]]" = OrderedDict()
+        self.bytes = 0
+        self.generation = 0       # bumped on invalidation; stale in-flight misses are not stored
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def key(normalized: str, accept: str) -> str:
+        return hashlib.sha1(f"{accept}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl and time.monotonic() - entry[3] > self.ttl:
+            self._drop(key, "ttl")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            CACHE_REQUESTS.inc(result="miss")
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        CACHE_REQUESTS.inc(result="hit")
+        return entry[0], entry[1]
+
+    def put(self, key: str, body: bytes, media_type: str, graphs: FrozenSet[str], generation: int):
+        if generation != self.generation or len(body) > self.max_entry_bytes:
+            return
+        if key in self._entries:
+            self._drop(key, None)
+        self._entries[key] = (body, media_type, graphs, time.monotonic())
+        self.bytes += len(body)
+        while self.bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)), "lru")
+
+    def _drop(self, key: str, reason: Optional[str]):
+        body = self._entries.pop(key)[0]
+        self.bytes -= len(body)
+        if reason:
+            CACHE_EVICTIONS.inc(reason=reason)
+
+    def invalidate(self, graphs: Optional[FrozenSet[str]] = None) -> int:
+        """Drop everything, or entries that name one of `graphs` or read the default/union graph."""
+        self.generation += 1
+        if graphs is None:
+            doomed = list(self._entries)
+        else:
+            doomed = [k for k, e in self._entries.items() if not e[2] or e[2] & graphs]
+        for k in doomed:
+            self._drop(k, "update")
+        return len(doomed)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "ttl_s": self.ttl or None, "invalidate": CACHE_INVALIDATE}
+
+_cache = ResultCache(int(CACHE_MB * 2**20), int(CACHE_ENTRY_MB * 2**20), CACHE_TTL) if CACHE_MB > 0 else None
 
 class SPARQLQuery(BaseModel):
     query: str
+    timeout: Optional[float] = None   # seconds; defaults to PROXY_TIMEOUT, capped at PROXY_MAX_TIMEOUT
+    cache: bool = True                # False: bypass the result cache (read and write)
+    stream: bool = False              # True: relay upstream bytes as they arrive (still content-encoded, never cached)
+
+class SPARQLUpdateBatch(BaseModel):
+    updates: List[str]                # sent as one request (one transaction), in order
+    timeout: Optional[float] = None
+
+class SPARQLBatch(BaseModel):
+    queries: List[SPARQLQuery]        # "stream" is ignored; results come back in this order
+    concurrency: Optional[int] = None # capped at PROXY_BATCH_CONCURRENCY
 
 def _is_graph_query(q: str) -> bool:
     q0 = q.lstrip().upper()
     return q0.startswith("CONSTRUCT") or q0.startswith("DESCRIBE")
 
-@app.get("/health")
-def health():
-    return {"ok": True, "fuseki": FUSEKI}
-
-@app.post("/query")
-def query(body: SPARQLQuery):
+def _accept(q: str) -> str:
     # SELECT/ASK -> JSON; CONSTRUCT/DESCRIBE -> JSON-LD (so still JSON)
-    accept = "application/sparql-results+json"
-    if _is_graph_query(body.query):
-        accept = "application/ld+json"
+    return "application/ld+json" if _is_graph_query(q) else "application/sparql-results+json"
 
+def _timeout(seconds: Optional[float], cap: Optional[float] = None) -> httpx.Timeout:
+    read = min(seconds, cap or MAX_TIMEOUT) if seconds else READ_TIMEOUT
+    return httpx.Timeout(read, connect=CONNECT_TIMEOUT, pool=POOL_TIMEOUT)
+
+async def _upstream(endpoint: str, content, headers: dict, timeout: Optional[float] = None,
+                    auth: Optional[httpx.Auth] = None, stream: bool = False, method: str = "POST",
+                    params: Optional[dict] = None, timeout_cap: Optional[float] = None) -> httpx.Response:
+    """POST to {FUSEKI}/{endpoint}; maps transport failures to 502/503/504 and upstream errors through.
+    `content` may be bytes or an async iterator (sent chunked). With stream=True the response
+    body is left unread; the caller must consume it and aclose() the response. `timeout_cap`
+    replaces PROXY_MAX_TIMEOUT as the ceiling on `timeout` (bulk loads)."""
+    client = _get_client()
+    request = client.build_request(method, f"{FUSEKI}/{endpoint}", content=content, headers=headers,
+                                   params=params, timeout=_timeout(timeout, timeout_cap))
     try:
-        r = requests.post(
-            f"{FUSEKI}/sparql",
-            data=body.query.encode("utf-8"),
-            headers={"Accept": accept, "Content-Type": "application/sparql-query"},
-            timeout=60,
-            # auth=AUTH,  # uncomment if your /sparql requires auth
-        )
-    except requests.RequestException as e:
+        with metrics.stage("upstream", UPSTREAM_SECONDS, endpoint=endpoint):
+            r = await client.send(request, auth=auth, stream=stream)
+    except httpx.PoolTimeout:
+        UPSTREAM_RESPONSES.inc(endpoint=endpoint, status="error")
+        raise HTTPException(status_code=503, detail="Upstream connection pool exhausted")
+    except httpx.TimeoutException as e:
+        UPSTREAM_RESPONSES.inc(endpoint=endpoint, status="error")
+        raise HTTPException(status_code=504, detail=f"Upstream timeout: {e!r}")
+    except httpx.HTTPError as e:
+        UPSTREAM_RESPONSES.inc(endpoint=endpoint, status="error")
         raise HTTPException(status_code=502, detail=str(e))
+    UPSTREAM_RESPONSES.inc(endpoint=endpoint, status=r.status_code)
 
     if r.status_code >= 400:
+        if stream:
+            await _read_error(r)
+        UPSTREAM_BYTES.inc(r.num_bytes_downloaded, endpoint=endpoint)
         raise HTTPException(status_code=r.status_code, detail=r.text)
+    if not stream:
+        UPSTREAM_BYTES.inc(r.num_bytes_downloaded, endpoint=endpoint)
+    return r
 
-    if accept == "application/sparql-results+json":
-        return JSONResponse(r.json())
+async def _read_error(r: httpx.Response):
+    try:
+        await r.aread()
+    except httpx.HTTPError:
+        pass
+    finally:
+        await r.aclose()
+
+async def _relay(r: httpx.Response, chunks: AsyncIterator[bytes], head: bytes = b"") -> AsyncIterator[bytes]:
+    # body of a StreamingResponse; closes the upstream response however the client goes away
+    try:
+        if head:
+            yield head
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        UPSTREAM_BYTES.inc(r.num_bytes_downloaded, endpoint="sparql")
+        await r.aclose()
+
+# ---------- Query execution ----------
+class _Spill:
+    """A result too big to buffer: the buffered head plus the rest of the upstream stream."""
+    def __init__(self, r: httpx.Response, chunks: AsyncIterator[bytes], head: bytes, media_type: str):
+        self.r, self.chunks, self.head, self.media_type = r, chunks, head, media_type
+        self.claimed = False
+
+    def response(self) -> StreamingResponse:
+        STREAMED.inc(mode="spill")
+        return StreamingResponse(_relay(self.r, self.chunks, self.head), media_type=self.media_type,
+                                 headers={"X-Cache": "BYPASS"})
+
+    async def aclose(self):
+        UPSTREAM_BYTES.inc(self.r.num_bytes_downloaded, endpoint="sparql")
+        await self.r.aclose()
+
+Result = Union[Tuple[bytes, str], _Spill]
+
+async def _read_result(r: httpx.Response, accept: str) -> Result:
+    # buffer up to PROXY_STREAM_BUFFER_MB; anything bigger is streamed on from there (and not cached)
+    media_type = r.headers.get("content-type", accept)
+    chunks = r.aiter_bytes()
+    head, size, limit = [], 0, int(STREAM_BUFFER_MB * 2**20)
+    try:
+        async for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                return _Spill(r, chunks, b"".join(head), media_type)
+    except httpx.HTTPError as e:
+        await r.aclose()
+        timed_out = isinstance(e, httpx.TimeoutException)
+        raise HTTPException(status_code=504 if timed_out else 502, detail=str(e))
+    except BaseException:
+        await r.aclose()
+        raise
+    UPSTREAM_BYTES.inc(r.num_bytes_downloaded, endpoint="sparql")
+    await r.aclose()
+    return b"".join(head), media_type
+
+# Single-flight: concurrent requests for the same normalized query wait on one upstream
+# call. The call runs as its own task so a leader that disconnects does not fail the
+# others; it is cancelled once nobody is waiting. A spilled (streamed) result can only
+# be relayed once, so whoever claims it first streams it and the rest fetch their own.
+# Keys carry the /update count, so reads issued after a write never join an older call,
+# plus the cache flag and the effective read timeout.
+class _Flight:
+    def __init__(self, task: "asyncio.Task[Result]"):
+        self.task, self.waiters = task, 0
+
+_inflight: Dict[str, _Flight] = {}
+_writes = 0
+
+async def _join(key: str, fetch) -> Tuple[Optional[Result], bool]:
+    """(result, shared); result is None when another waiter claimed a spilled stream."""
+    flight = _inflight.get(key)
+    shared = flight is not None
+    if flight is None:
+        flight = _inflight[key] = _Flight(asyncio.ensure_future(fetch()))
+        flight.task.add_done_callback(lambda _t: _inflight.pop(key) if _inflight.get(key) is flight else None)
     else:
-        return Response(content=r.text, media_type=accept)
+        COALESCED.inc()
+    flight.waiters += 1
+    try:
+        result = await asyncio.shield(flight.task)
+        if isinstance(result, _Spill):
+            if result.claimed:
+                return None, shared
+            result.claimed = True
+        return result, shared
+    finally:
+        flight.waiters -= 1
+        if flight.waiters == 0:
+            if not flight.task.done():
+                flight.task.cancel()
+            elif not flight.task.cancelled() and flight.task.exception() is None:
+                spill = flight.task.result()
+                if isinstance(spill, _Spill) and not spill.claimed:
+                    spill.claimed = True
+                    asyncio.ensure_future(spill.aclose())
 
-@app.post("/update")
-def update(body: SPARQLQuery):
+# ---------- Local engine ----------
+async def _refresh_local():
     try:
-        r = requests.post(
-            f"{FUSEKI}/update",
-            data=body.query.encode("utf-8"),
-            headers={"Content-Type": "application/sparql-update"},
-            auth=AUTH,     # updates usually require admin
-            timeout=60,
-        )
-    except requests.RequestException as e:
-        raise HTTPException(status_code=502, detail=str(e))
+        reloaded = _local.stale() and await asyncio.to_thread(_local.reload)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=f"Local engine data files missing: {e}")
+    if reloaded:
+        _after_write(None)                             # files changed: cached results are stale
 
-    if r.status_code >= 400:
-        raise HTTPException(status_code=r.status_code, detail=r.text)
+async def _local_call(fn, *args):
+    """Run a local_sparql call off the event loop (re-reading the files first if they changed)."""
+    await _refresh_local()
+    try:
+        with metrics.stage("local", UPSTREAM_SECONDS, endpoint="local"):
+            return await asyncio.to_thread(fn, *args)
+    except Exception as e:                             # rdflib parse/evaluation errors have no common base
+        raise HTTPException(status_code=400, detail=f"{type(e).__name__}: {e}")
 
-    return {"ok": True}
+@app.get("/health")
+def health():
+    if _local is not None:
+        return {"ok": True, "engine": "local", **_local.stats()}
+    return {"ok": True, "engine": "fuseki", "fuseki": FUSEKI}
+
+@app.get("/cache/stats")
+async def cache_stats():                   # async: the cache is only touched on the event loop
+    return {"enabled": _cache is not None, **(_cache.stats() if _cache else {})}
+
+@app.post("/cache/flush")
+async def cache_flush():
+    return {"ok": True, "dropped": _cache.invalidate() if _cache else 0}
+
+async def _execute(body: SPARQLQuery) -> Tuple[Result, Dict[str, str]]:
+    """Cache lookup, then a (coalesced) upstream read; returns the result and X-Cache headers."""
+    if _local is not None:
+        await _refresh_local()
+    accept = _accept(body.query)
+    normalized = normalize_query(body.query)
+    key = ResultCache.key(normalized, accept)
+    use_cache = _cache is not None and body.cache
+    if use_cache:
+        hit = _cache.get(key)
+        if hit is not None:
+            return hit, {"X-Cache": "HIT"}
+        generation = _cache.generation
+    elif _cache is not None:
+        CACHE_REQUESTS.inc(result="bypass")
+
+    async def fetch() -> Result:
+        if _local is not None:
+            result = await _local_call(_local.query, body.query)
+            if use_cache:
+                _cache.put(key, result[0], result[1], graphs_referenced(normalized), generation)
+            return result
+        r = await _upstream("sparql", body.query.encode("utf-8"),
+                            {"Accept": accept, "Content-Type": "application/sparql-query"},
+                            timeout=body.timeout, stream=True)  # auth=AUTH if your /sparql requires auth
+        result = await _read_result(r, accept)
+        if use_cache and not isinstance(result, _Spill):
+            _cache.put(key, result[0], result[1], graphs_referenced(normalized), generation)
+        return result
+
+    # only requests with the same cache mode and read timeout share a call, so each one gets
+    # its own caching and timeout behaviour
+    flight = f"{key}:{_writes}:{int(use_cache)}:{_timeout(body.timeout).read}"
+    result, shared = (await _join(flight, fetch)) if COALESCE else (None, False)
+    if result is None:
+        result = await fetch()
+    headers = {"X-Cache": "MISS" if use_cache else "BYPASS"}
+    if shared:
+        headers["X-Coalesced"] = "1"
+    return result, headers
+
+@app.post("/query")
+async def query(body: SPARQLQuery, request: Request):
+    if body.stream and _local is None:
+        # passthrough: the client's Accept-Encoding goes upstream and the encoded bytes come
+        # straight back (GZipMiddleware leaves responses that already carry Content-Encoding alone)
+        if _cache is not None:
+            CACHE_REQUESTS.inc(result="bypass")
+        accept = _accept(body.query)
+        headers = {"Accept": accept, "Content-Type": "application/sparql-query",
+                   "Accept-Encoding": request.headers.get("accept-encoding", "identity")}
+        r = await _upstream("sparql", body.query.encode("utf-8"), headers, timeout=body.timeout, stream=True)
+        out = {"X-Cache": "BYPASS"}
+        for h in ("content-encoding", "content-length"):
+            if h in r.headers:
+                out[h] = r.headers[h]
+        STREAMED.inc(mode="passthrough")
+        return StreamingResponse(_relay(r, r.aiter_raw()), media_type=r.headers.get("content-type", accept),
+                                 headers=out)
+
+    result, headers = await _execute(body)
+    if isinstance(result, _Spill):
+        return result.response()
+    return Response(content=result[0], media_type=result[1], headers=headers)
+
+@app.post("/query/batch")
+async def query_batch(batch: SPARQLBatch):
+    """Run many queries with bounded concurrency. Response: {"results": [...]} in request order,
+    each {"ok": true, "cache": ..., "result": <SPARQL JSON>} or {"ok": false, "status": ..., "error": ...}."""
+    if len(batch.queries) > BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX} queries per batch")
+    BATCH_QUERIES.observe(len(batch.queries))
+    sem = asyncio.Semaphore(max(1, min(batch.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)))
+
+    def error(status: int, detail) -> bytes:
+        return json.dumps({"ok": False, "status": status, "error": detail}).encode("utf-8")
+
+    async def one(q: SPARQLQuery) -> bytes:
+        async with sem:
+            try:
+                result, headers = await _execute(q)
+            except HTTPException as e:
+                return error(e.status_code, e.detail)
+        if isinstance(result, _Spill):
+            await result.aclose()
+            return error(413, "Result exceeds PROXY_STREAM_BUFFER_MB; run it through /query")
+        content, media_type = result
+        if "json" not in media_type:
+            content = json.dumps(content.decode("utf-8", "replace")).encode("utf-8")
+        # upstream JSON is spliced in as-is rather than parsed and re-serialized
+        return b'{"ok":true,"cache":"%s","result":%s}' % (headers["X-Cache"].lower().encode(), content)
+
+    parts = await asyncio.gather(*(one(q) for q in batch.queries))
+    return Response(content=b'{"results":[' + b",".join(parts) + b"]}", media_type="application/json")
+
+# ---------- Writes ----------
+# Graph Store Protocol content types accepted by /load; quad formats carry their own graphs.
+LOAD_TYPES = {"text/turtle", "application/n-triples", "application/rdf+xml", "application/ld+json",
+              "application/n-quads", "application/trig"}
+QUAD_TYPES = {"application/n-quads", "application/trig"}
+
+def _after_write(graphs: Optional[FrozenSet[str]]) -> int:
+    """Bump the write count and invalidate the cache; graphs=None (or empty) flushes everything."""
+    global _writes
+    _writes += 1
+    if _cache is None:
+        return 0
+    return _cache.invalidate((graphs or None) if CACHE_INVALIDATE == "graph" else None)
+
+@app.post("/update")
+async def update(body: SPARQLQuery):
+    if _local is not None:
+        await _local_call(_local.update, body.query)
+    else:
+        await _upstream("update", body.query.encode("utf-8"),
+                        {"Content-Type": "application/sparql-update"},
+                        timeout=body.timeout, auth=AUTH)    # updates usually require admin
+    dropped = _after_write(graphs_referenced(normalize_query(body.query)))
+    return {"ok": True, "cache_invalidated": dropped}
+
+@app.post("/update/batch")
+async def update_batch(batch: SPARQLUpdateBatch):
+    # SPARQL 1.1 Update allows "op ; op ; ..." (each with its own PREFIXes) in one request,
+    # which Fuseki applies as a single transaction: all or nothing. The separator goes on its
+    # own line so an operation that ends in a "# comment" cannot swallow it.
+    ops = [u.strip().rstrip(";").strip() for u in batch.updates]
+    ops = [u for u in ops if u]
+    if not ops:
+        raise HTTPException(status_code=400, detail="No updates")
+    if len(ops) > UPDATE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {UPDATE_BATCH_MAX} updates per batch")
+    if _local is not None:
+        await _local_call(_local.update, "\n;\n".join(ops))
+    else:
+        await _upstream("update", "\n;\n".join(ops).encode("utf-8"),
+                        {"Content-Type": "application/sparql-update"},
+                        timeout=batch.timeout, auth=AUTH)
+    per_op = [graphs_referenced(normalize_query(u)) for u in ops]
+    graphs = None if not all(per_op) else frozenset().union(*per_op)   # any default-graph op: flush
+    return {"ok": True, "updates": len(ops), "cache_invalidated": _after_write(graphs)}
+
+@app.post("/load")
+async def load(request: Request, graph: Optional[str] = None, replace: bool = False,
+               timeout: Optional[float] = None):
+    """Stream an RDF upload (request body) to the Graph Store endpoint {FUSEKI}/data without
+    buffering it: POST appends to `graph` (default graph if omitted), replace=true PUTs over it."""
+    ctype = request.headers.get("content-type", "text/turtle").split(";")[0].strip().lower()
+    if ctype not in LOAD_TYPES:
+        raise HTTPException(status_code=415, detail=f"Unsupported RDF type {ctype!r}; use one of {sorted(LOAD_TYPES)}")
+    if ctype in QUAD_TYPES:
+        if graph:
+            raise HTTPException(status_code=400, detail="Quad formats name their own graphs; omit ?graph")
+        params = None
+    else:
+        params = {"graph": graph} if graph else {"default": ""}
+
+    if _local is not None:                            # rdflib parses whole documents, so buffer here
+        data = await request.body()
+        LOAD_BYTES.inc(len(data))
+        added = await _local_call(_local.load, data, ctype, graph, replace)
+        dropped = _after_write(frozenset([graph]) if graph else None)
+        return {"ok": True, "graph": graph or ("default" if params else None), "replaced": replace,
+                "bytes": len(data), "upstream": {"tripleCount": added}, "cache_invalidated": dropped}
+
+    sent = 0
+    async def body():
+        nonlocal sent
+        async for chunk in request.stream():
+            sent += len(chunk)
+            yield chunk
+
+    headers = {"Content-Type": request.headers.get("content-type", ctype)}
+    for h in ("content-length", "content-encoding"):       # keep a known length (no chunked encoding) and gzip uploads
+        if h in request.headers:
+            headers[h] = request.headers[h]
+    try:
+        r = await _upstream("data", body(), headers, timeout=timeout or LOAD_TIMEOUT, auth=AUTH,
+                            method="PUT" if replace else "POST", params=params, timeout_cap=LOAD_TIMEOUT)
+    finally:
+        LOAD_BYTES.inc(sent)
+    counts = r.json() if "json" in r.headers.get("content-type", "") else None
+    dropped = _after_write(frozenset([graph]) if graph else None)
+    return {"ok": True, "graph": graph or ("default" if params else None), "replaced": replace,
+            "bytes": sent, "upstream": counts, "cache_invalidated": dropped}
@@ -0,0 +1,159 @@
+# local_sparql.py
+# In-process SPARQL engine over the ADTO Turtle files, used by fuseki_proxy when
+# PROXY_ENGINE=local (small deployments, CI, offline work). Files are parsed into an
+# rdflib in-memory store (SPO/POS/OSP-indexed) whose default graph is the union of all
+# graphs, like Fuseki's unionDefaultGraph; results are serialized to the same
+# bytes Fuseki returns (SPARQL JSON for SELECT/ASK, JSON-LD for CONSTRUCT/DESCRIBE).
+# The files are re-read when their mtime/size changes; updates and /load data live
+# in memory only and are lost on reload.
+import os, threading, time, warnings
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from rdflib import ConjunctiveGraph, URIRef
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.query import Result
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_FILES = [ROOT / "Knowledge Graph" / "adto_schema.ttl", ROOT / "Knowledge Graph" / "adto_city_data.ttl"]
+
+# content type -> rdflib parser
+FORMATS = {"text/turtle": "turtle", "application/n-triples": "nt", "application/rdf+xml": "xml",
+           "application/ld+json": "json-ld", "application/n-quads": "nquads", "application/trig": "trig"}
+
+class _RWLock:
+    """Many readers or one writer; waiting writers hold off new readers."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+_parse_lock = threading.Lock()           # rdflib's pyparsing grammar is not thread-safe
+
+@lru_cache(maxsize=512)
+def _prepare(query: str):
+    return prepareQuery(query)
+
+def _prepared(query: str):
+    # parse + algebra translation dominates small queries; repeated texts skip it
+    with _parse_lock:
+        return _prepare(query)
+
+class LocalStore:
+    def __init__(self, files: List[Path], check_every: float = 2.0):
+        self.files = [Path(f) for f in files]
+        self.check_every = check_every
+        self.ds: Optional[ConjunctiveGraph] = None
+        self.loaded_at = 0.0
+        self.load_s = 0.0
+        self._signature: Optional[tuple] = None
+        self._checked = 0.0
+        # rdflib's memory store is not safe for concurrent writes, but queries only read it:
+        # they share the lock, so /query/batch runs local queries side by side
+        self._lock = _RWLock()
+
+    def _stat(self) -> tuple:
+        out = []
+        for f in self.files:
+            try:
+                st = f.stat()
+                out.append((str(f), st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                out.append((str(f), None, None))
+        return tuple(out)
+
+    def stale(self) -> bool:
+        """Cheap check (stats the files at most every check_every seconds)."""
+        now = time.monotonic()
+        if self.ds is not None and now - self._checked < self.check_every:
+            return False
+        self._checked = now
+        return self.ds is None or self._stat() != self._signature
+
+    def reload(self) -> bool:
+        """Re-parse the files if they changed; returns True if the dataset was replaced."""
+        with self._lock.write():
+            signature = self._stat()
+            if self.ds is not None and signature == self._signature:
+                return False
+            missing = [s[0] for s in signature if s[1] is None]
+            if missing:
+                raise FileNotFoundError(", ".join(missing))
+            t0 = time.perf_counter()
+            # ConjunctiveGraph is deprecated in rdflib 7 but still needed: Dataset fails on a
+            # default-graph INSERT DATA ("not enough values to unpack"), which /update must accept
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", DeprecationWarning)
+                ds = ConjunctiveGraph()
+            for f in self.files:
+                ds.default_context.parse(f, format="turtle")
+            self.ds, self._signature = ds, signature
+            self.load_s = time.perf_counter() - t0
+            self.loaded_at = time.time()
+            return True
+
+    def query(self, text: str) -> Tuple[bytes, str]:
+        with self._lock.read():
+            result: Result = self.ds.query(_prepared(text))
+            if result.type in ("CONSTRUCT", "DESCRIBE"):
+                return result.graph.serialize(format="json-ld", encoding="utf-8"), "application/ld+json"
+            return result.serialize(format="json"), "application/sparql-results+json"
+
+    def update(self, text: str):
+        with self._lock.write():
+            self.ds.update(text)
+
+    def load(self, data: bytes, content_type: str, graph: Optional[str], replace: bool) -> int:
+        """Parse an upload into `graph` (default graph if None); returns the triples added."""
+        with self._lock.write():
+            if content_type in ("application/n-quads", "application/trig"):
+                before = len(self.ds)
+                self.ds.parse(data=data, format=FORMATS[content_type])
+                return len(self.ds) - before
+            target = self.ds.get_context(URIRef(graph)) if graph else self.ds.default_context
+            if replace:
+                target.remove((None, None, None))
+            before = len(target)
+            target.parse(data=data, format=FORMATS[content_type])
+            return len(target) - before
+
+    def stats(self) -> dict:
+        return {"files": [str(f) for f in self.files], "triples": len(self.ds) if self.ds is not None else 0,
+                "loaded_at": self.loaded_at, "load_s": round(self.load_s, 3)}
+
+def from_env() -> LocalStore:
+    files = os.getenv("LOCAL_TTL", "")
+    return LocalStore([Path(f) for f in files.split(os.pathsep) if f] or DEFAULT_FILES,
+                      float(os.getenv("LOCAL_RELOAD_S", "2")))
@@ -0,0 +1,193 @@
+# metrics.py
+# Minimal Prometheus text-format metrics shared by the support_api services
+# (stdlib only, so the services need no extra dependency to expose /metrics),
+# plus per-request stage timings reported as a Server-Timing header.
+import os, time, threading, contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+TIMING_HEADERS = os.getenv("METRICS_TIMING_HEADERS", "0") == "1"   # add Server-Timing to responses
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_registry: List["_Metric"] = []
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...] = ()):
+        self.name, self.doc, self.label_names = name, doc, tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(k, "")) for k in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, doc, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return super().render() + [f"{self.name}{_labels(self.label_names, k)} {v:g}" for k, v in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}    # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = super().render()
+        for key, row in items:
+            for le, n in [*zip(('le="%g"' % b for b in self.buckets), row), ('le="+Inf"', row[-1])]:
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {n}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {row[-2]:g}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {row[-1]}")
+        return lines
+
+def render() -> str:
+    return "\n".join(line for m in list(_registry) for line in m.render()) + "\n"
+
+# ---------- Stage timings ----------
+# A request (or a background job) collects (stage, seconds) pairs in a context-local
+# list; stage() feeds both that list and a histogram.
+_timings: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("stage_timings", default=None)
+
+@contextmanager
+def collect_timings():
+    timings: list = []
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+def record_timing(name: str, seconds: float):
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+@contextmanager
+def stage(name: str, histogram: Optional[Histogram] = None, **labels):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        if histogram is not None:
+            histogram.observe(dt, **labels)
+        record_timing(name, dt)
+
+def summarize(timings: Optional[list] = None) -> Dict[str, float]:
+    """stage -> total milliseconds, in first-seen order."""
+    out: Dict[str, float] = {}
+    for name, dt in (timings if timings is not None else (_timings.get() or [])):
+        out[name] = out.get(name, 0.0) + dt * 1000
+    return {k: round(v, 1) for k, v in out.items()}
+
+def server_timing(timings: list, total_s: float) -> str:
+    parts = [f"{name};dur={ms}" for name, ms in summarize(timings).items()]
+    return ", ".join(parts + [f"total;dur={total_s * 1000:.1f}"])
+
+# ---------- ASGI ----------
+class MetricsMiddleware:
+    """Per-route request counters/latency; opens a timing context and (optionally) adds Server-Timing."""
+    def __init__(self, app, service: str, requests_total: Counter, request_seconds: Histogram,
+                 timing_headers: bool = TIMING_HEADERS):
+        self.app, self.service = app, service
+        self.requests_total, self.request_seconds = requests_total, request_seconds
+        self.timing_headers = timing_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings: list = []
+        token = _timings.set(timings)
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.timing_headers:
+                    header = server_timing(timings, time.perf_counter() - t0).encode("latin-1")
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.request_seconds.observe(time.perf_counter() - t0, service=self.service, route=route)
+            self.requests_total.inc(service=self.service, route=route, method=scope["method"], status=status)
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.",
+                        ("service", "route", "method", "status"))
+HTTP_SECONDS = Histogram("http_request_seconds", "HTTP request latency by route.", ("service", "route"))
+
+def instrument(app, service: str):
+    """Add the request middleware and a GET /metrics route to a FastAPI app."""
+    from fastapi.responses import Response
+    app.add_middleware(MetricsMiddleware, service=service,
+                       requests_total=HTTP_REQUESTS, request_seconds=HTTP_SECONDS)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(content=render(), media_type=CONTENT_TYPE)
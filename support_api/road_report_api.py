@@ -1,37 +1,77 @@
 # road_report_api.py
-import os, math, json, re, uuid, time
+from __future__ import annotations
+import time
+_IMPORT_T0 = time.perf_counter()
+import os, io, math, json, re, uuid, threading, hashlib, codecs, itertools, sqlite3, logging
+import multiprocessing
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict, Callable, Tuple, Iterator, Literal
 
 from fastapi import FastAPI, HTTPException, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 import requests
-import pandas as pd
-from shapely import wkt as shapely_wkt
-from shapely.geometry import shape as shapely_shape, LineString, MultiLineString, Polygon, MultiPolygon
-from shapely.ops import transform as shp_transform
-from pyproj import CRS, Transformer
-import matplotlib
-matplotlib.use("Agg")              # headless-safe
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
+import metrics
+from metrics import Counter, Histogram
+
+# numpy/pandas/shapely/pyproj/matplotlib cost over a second to import, so they are
+# bound into these globals by _load_stack() on first use (see "Heavy stack" below).
+np = pd = shapely = shapely_shape = LineString = MultiLineString = Polygon = MultiPolygon = None
+CRS = Transformer = Geod = matplotlib = Figure = LineCollection = Line2D = PdfPages = None
+
+log = logging.getLogger("road_report_api")
 
 # ---------- Config (env) ----------
 SPARQL_ENDPOINT = os.getenv("SPARQL_ENDPOINT", "http://localhost:8111/query")  # proxy JSON or direct /sparql
 USE_PROXY_JSON  = SPARQL_ENDPOINT.endswith("/query")
-DEFAULT_EPSG    = int(os.getenv("DEFAULT_EPSG", "32644"))  # India UTM 44N
+_EPSG_ENV       = os.getenv("DEFAULT_EPSG", "auto").strip().lower()   # e.g. 32644 (UTM 44N) to pin one CRS
+DEFAULT_EPSG    = 0 if _EPSG_ENV in ("", "auto", "0") else int(_EPSG_ENV)  # 0: UTM zone per segment
+LENGTH_MODE     = os.getenv("LENGTH_MODE", "projected")    # "projected" or "geodesic"
 API_KEY         = os.getenv("ROAD_API_KEY", "")            # set to a non-empty string for auth
 PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "")         # e.g., https://abcd1234.ngrok-free.app
+REPORT_WORKERS  = int(os.getenv("REPORT_WORKERS", "2"))    # concurrent report builds
+REPORT_MAX_JOBS = int(os.getenv("REPORT_MAX_JOBS", "32"))  # queued + running before 429
+JOB_TTL_S       = int(os.getenv("REPORT_JOB_TTL", "3600")) # keep finished job records this long
+CACHE_CHECK_TTL = float(os.getenv("REPORT_CACHE_CHECK_TTL", "0"))   # trust the last KG probe this long (s); 0 = probe every request
+REPORT_CACHE_MAX_MB  = float(os.getenv("REPORT_CACHE_MAX_MB", "512"))      # cached PDFs kept in REPORT_DIR (0 = no size cap)
+REPORT_CACHE_MAX_AGE = float(os.getenv("REPORT_CACHE_MAX_AGE", "604800"))  # seconds since last use (0 = no age cap)
+SPARQL_CHUNK_ROWS = int(os.getenv("SPARQL_CHUNK_ROWS", "50000"))    # rows per streamed DataFrame chunk
+SPARQL_READ_BYTES = 1 << 16
+REPORT_MAP_DPI  = int(os.getenv("REPORT_MAP_DPI", "150"))  # resolution the map page is simplified for
+RENDER_PROCS    = int(os.getenv("REPORT_RENDER_PROCS", str(min(4, os.cpu_count() or 1))))  # 0 = render in-process
+# The pool can save at most the non-map pages (~0.8 s, flat in size: the map is one page),
+# while a cold spawn worker pays ~1.7 s of imports; from ~20k segments the render is long
+# enough that the saving shows (benchmarks: run_benchmarks --render-procs N).
+RENDER_PARALLEL_MIN = int(os.getenv("REPORT_RENDER_PARALLEL_MIN", "20000"))  # segments before pages go to the pool
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "10000"))    # rows per written export chunk
+SEGMENT_CACHE_DB = os.getenv("SEGMENT_CACHE_DB", "./cache/segments.sqlite")  # "" disables the per-segment cache
+GEOJSON_DIR     = Path(os.getenv("GEOJSON_DIR", Path(__file__).resolve().parent.parent / "geoJSON"))  # layer fallback
+REPORT_WARMUP   = os.getenv("REPORT_WARMUP", "")           # "", "stack" (imports, fonts, CRS) or "full" (+ render pool)
+IMPORT_BUDGET_S = float(os.getenv("REPORT_IMPORT_BUDGET_S", "1.0"))  # warn when this module imports slower
 
 # Output dir exposed at /files
 REPORT_DIR = Path(os.getenv("REPORT_DIR", "./reports")).absolute()
 REPORT_DIR.mkdir(parents=True, exist_ok=True)
 
 # ---------- FastAPI ----------
-app = FastAPI(title="RoadSegment Report API", version="1.0")
+@asynccontextmanager
+async def _lifespan(_app):
+    # checked here rather than at import so spawned render workers (which re-import this
+    # module) do not each log it
+    if IMPORT_S > IMPORT_BUDGET_S:
+        log.warning("road_report_api imported in %.2fs (budget %.2fs)", IMPORT_S, IMPORT_BUDGET_S)
+    if REPORT_WARMUP:      # in the background: /health must answer straight away
+        threading.Thread(target=warm_up, args=(REPORT_WARMUP == "full",), daemon=True, name="warm-up").start()
+    yield
+
+app = FastAPI(title="RoadSegment Report API", version="1.0", lifespan=_lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True,
@@ -39,6 +79,63 @@ app.add_middleware(
 )
 app.mount("/files", StaticFiles(directory=str(REPORT_DIR)), name="files")
 
+# ---------- Metrics ----------
+# Exposed at /metrics (Prometheus text format). Stage timings of the current request
+# or job are also returned as `timings_ms` and, with METRICS_TIMING_HEADERS=1, as a
+# Server-Timing response header.
+metrics.instrument(app, "road_report_api")
+STAGE_SECONDS  = Histogram("report_stage_seconds", "Report pipeline stage duration.", ("stage",))
+PAGE_SECONDS   = Histogram("report_page_render_seconds", "Build + draw time of one PDF page.", ("kind",))
+SPARQL_SECONDS = Histogram("report_sparql_seconds", "SPARQL round-trip, request to last byte.", ("query",))
+SPARQL_FIRST_BYTE = Histogram("report_sparql_first_byte_seconds", "SPARQL time to response headers.", ("query",))
+SPARQL_DECODE  = Histogram("report_sparql_decode_seconds", "Result JSON decoding time per query.", ("query",))
+SPARQL_STATUS  = Counter("report_sparql_responses_total", "SPARQL responses by status.", ("query", "status"))
+SPARQL_BYTES   = Counter("report_sparql_bytes_total", "Bytes received from the SPARQL endpoint.", ("query",))
+SPARQL_ROWS    = Counter("report_sparql_rows_total", "Result rows decoded.", ("query",))
+REPORTS        = Counter("reports_total", "Report requests by outcome (built, cached, error).", ("outcome",))
+REPORT_BYTES   = Counter("report_pdf_bytes_total", "Bytes of PDF written.")
+
+def _stage(name: str):
+    return metrics.stage(name, STAGE_SECONDS, stage=name)
+
+# ---------- Heavy stack ----------
+_stack_lock = threading.Lock()
+_stack_loaded = False
+_stack_load_s: Optional[float] = None
+
+def _load_stack():
+    """Bind the numeric/geo/plotting modules into this module's globals (idempotent)."""
+    global _stack_loaded, _stack_load_s, np, pd, shapely, shapely_shape, LineString, MultiLineString
+    global Polygon, MultiPolygon, CRS, Transformer, Geod, matplotlib, Figure, LineCollection, Line2D, PdfPages
+    if _stack_loaded:
+        return
+    with _stack_lock:
+        if _stack_loaded:
+            return
+        t0 = time.perf_counter()
+        import numpy as np
+        import pandas as pd
+        import shapely                      # >= 2.0: vectorized geometry-array API
+        from shapely.geometry import shape as shapely_shape, LineString, MultiLineString, Polygon, MultiPolygon
+        from pyproj import CRS, Transformer, Geod
+        import matplotlib
+        matplotlib.use("Agg")              # headless-safe
+        from matplotlib.figure import Figure   # OO API: safe to render from worker threads
+        from matplotlib.collections import LineCollection
+        from matplotlib.lines import Line2D
+        from matplotlib.backends.backend_pdf import PdfPages
+        _stack_load_s = time.perf_counter() - t0
+        _stack_loaded = True
+
+def _with_stack(fn):
+    """Entry points into the pipeline load the heavy stack before running."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _stack_loaded:
+            _load_stack()
+        return fn(*args, **kwargs)
+    return wrapper
+
 PREFIXES = """
 PREFIX adto: <http://www.projectsynapse.com/ontologies/adto#>
 PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
@@ -47,123 +144,317 @@ PREFIX geo:  <http://www.opengis.net/ont/geosparql#>
 
 class ReportRequest(BaseModel):
     buffer_meters: float = 5.0
+    map_color_by: Literal["status", "road_class"] = "status"
+    length_mode: Literal["projected", "geodesic"] = LENGTH_MODE
+    refresh: bool = False          # ignore the report cache and rebuild
+
+    def report_params(self) -> dict:
+        """Parameters that shape the PDF (and therefore its cache key)."""
+        return {"buffer_meters": self.buffer_meters, "map_color_by": self.map_color_by,
+                "length_mode": self.length_mode}
 
 def _auth_or_403(x_api_key: Optional[str]):
     if API_KEY and (x_api_key or "") != API_KEY:
         raise HTTPException(status_code=403, detail="Forbidden")
 
 # ---------- SPARQL ----------
-def sparql_select(query: str) -> pd.DataFrame:
+_BINDINGS_START = re.compile(r'"bindings"\s*:\s*\[')
+_VARS_START     = re.compile(r'"vars"\s*:\s*')
+
+class SparqlResultsReader:
+    """
+    Incremental application/sparql-results+json reader. Text is fed as it arrives;
+    each binding is decoded on its own and its values appended to per-variable
+    column buffers, which are emitted as DataFrames every `chunk_rows` rows.
+    Neither the raw body nor a list of per-row dicts is ever held in full.
+    """
+    def __init__(self, chunk_rows: int = SPARQL_CHUNK_ROWS):
+        _load_stack()
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.vars: List[str] = []
+        self.cols: Dict[str, list] = {}
+        self.nrows = 0
+        self.emitted = 0
+        self._buf = ""
+        self._state = "seek"          # seek -> rows -> done
+        self._dec = json.JSONDecoder()
+
+    def _column(self, var: str) -> list:
+        col = self.cols.get(var)
+        if col is None:
+            col = self.cols[var] = [None] * self.nrows   # late var: backfill
+            self.vars.append(var)
+        return col
+
+    def _append(self, binding: dict):
+        for var, term in binding.items():
+            self._column(var).append(term.get("value"))
+        self.nrows += 1
+        for col in self.cols.values():
+            if len(col) < self.nrows:
+                col.append(None)
+
+    def _flush(self) -> pd.DataFrame:
+        df = pd.DataFrame({v: self.cols.get(v, [None] * self.nrows) for v in self.vars}, dtype="object")
+        self.emitted += self.nrows
+        self.cols = {v: [] for v in self.vars}
+        self.nrows = 0
+        return df
+
+    def _seek(self) -> bool:
+        if not self.vars:
+            m = _VARS_START.search(self._buf)
+            if m:
+                try:
+                    head_vars, _ = self._dec.raw_decode(self._buf, m.end())
+                    for v in head_vars:
+                        self._column(v)
+                except ValueError:
+                    pass                        # vars list not complete yet
+        m = _BINDINGS_START.search(self._buf)
+        if not m:
+            return False
+        self._buf = self._buf[m.end():]
+        self._state = "rows"
+        return True
+
+    def _rows(self, final: bool) -> Iterator[pd.DataFrame]:
+        buf, pos, n = self._buf, 0, len(self._buf)
+        while True:
+            while pos < n and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= n:
+                break
+            if buf[pos] == "]":
+                self._state = "done"; pos += 1
+                break
+            try:
+                binding, pos = self._dec.raw_decode(buf, pos)
+            except ValueError:
+                if final:
+                    raise
+                break                           # partial object: wait for more text
+            self._append(binding)
+            if self.nrows >= self.chunk_rows:
+                yield self._flush()
+        self._buf = buf[pos:]
+
+    def feed(self, text: str, final: bool = False) -> Iterator[pd.DataFrame]:
+        if self._state == "done":
+            return
+        self._buf += text
+        if self._state == "seek" and not self._seek():
+            if len(self._buf) > SPARQL_READ_BYTES * 4:   # never keep much pre-bindings text
+                self._buf = self._buf[-256:]
+            return
+        yield from self._rows(final)
+
+    def close(self) -> Iterator[pd.DataFrame]:
+        yield from self.feed("", final=True)
+        if self.nrows or not self.emitted:
+            yield self._flush()
+
+def _sparql_post(query: str, stream: bool = False) -> requests.Response:
     if USE_PROXY_JSON:
-        r = requests.post(
+        return requests.post(
             SPARQL_ENDPOINT,
             headers={"Content-Type": "application/json"},
             json={"query": PREFIXES + query},
-            timeout=120,
-        )
-    else:
-        r = requests.post(
-            SPARQL_ENDPOINT,
-            headers={"Accept":"application/sparql-results+json",
-                     "Content-Type":"application/sparql-query"},
-            data=(PREFIXES + query).encode("utf-8"),
-            timeout=120,
+            timeout=120, stream=stream,
         )
-    r.raise_for_status()
-    data = r.json()
-    rows = [{k:v.get("value") for k,v in b.items()} for b in data.get("results",{}).get("bindings",[])]
-    return pd.DataFrame(rows)
+    return requests.post(
+        SPARQL_ENDPOINT,
+        headers={"Accept":"application/sparql-results+json",
+                 "Content-Type":"application/sparql-query"},
+        data=(PREFIXES + query).encode("utf-8"),
+        timeout=120, stream=stream,
+    )
 
-def fetch_roadsegments() -> pd.DataFrame:
-    q = """
-    SELECT ?s ?name ?status
-           (COALESCE(?wkt_geo, ?wkt_adto)    AS ?wkt)
-           (COALESCE(?gj_geom, ?gj_subject)  AS ?geojson)
-    WHERE {
-      ?s a adto:RoadSegment .
-      OPTIONAL { ?s adto:hasName ?name }
-      OPTIONAL { ?s adto:hasStatus ?status }
+@_with_stack
+def iter_sparql_select(query: str, chunk_rows: int = SPARQL_CHUNK_ROWS,
+                       name: str = "select") -> Iterator[pd.DataFrame]:
+    """Stream a SELECT as DataFrame chunks while the response is still arriving."""
+    t0 = time.perf_counter()
+    nbytes, decode_s = 0, 0.0
+    with _sparql_post(query, stream=True) as r:
+        SPARQL_FIRST_BYTE.observe(time.perf_counter() - t0, query=name)
+        SPARQL_STATUS.inc(query=name, status=r.status_code)
+        r.raise_for_status()
+        reader = SparqlResultsReader(chunk_rows)
+        utf8 = codecs.getincrementaldecoder("utf-8")()
+        for raw in itertools.chain(r.iter_content(chunk_size=SPARQL_READ_BYTES), [None]):
+            t1 = time.perf_counter()
+            if raw is None:
+                frames = list(reader.feed(utf8.decode(b"", final=True))) + list(reader.close())
+            else:
+                nbytes += len(raw)
+                frames = list(reader.feed(utf8.decode(raw)))
+            decode_s += time.perf_counter() - t1
+            yield from frames
+    dt = time.perf_counter() - t0
+    SPARQL_SECONDS.observe(dt, query=name)
+    SPARQL_DECODE.observe(decode_s, query=name)
+    SPARQL_BYTES.inc(nbytes, query=name)
+    SPARQL_ROWS.inc(reader.emitted, query=name)
+    metrics.record_timing(f"sparql_{name}", dt)
+    metrics.record_timing("decode", decode_s)
+
+def sparql_select(query: str, name: str = "select") -> pd.DataFrame:
+    frames = list(iter_sparql_select(query, name=name))
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
 
+ROADSEGMENT_QUERY = """
+    # one row per segment: a segment shared by two roads (or a road with two classes or
+    # geometries) would otherwise repeat and inflate counts and lengths. The subquery
+    # picks one value per attribute and one geometry node, and the WKT and
+    # GeoJSON literals are then read from that node only, so they always describe the
+    # same geometry.
+    SELECT ?s ?name ?status ?road_class
+           (SAMPLE(COALESCE(?wkt_geo, ?wkt_adto))    AS ?wkt)
+           (SAMPLE(COALESCE(?gj_geom, ?gj_subject))  AS ?geojson)
+    WHERE {
+      {
+        SELECT ?s (MIN(?name_) AS ?name) (MIN(?status_) AS ?status) (MIN(?class_) AS ?road_class)
+               (SAMPLE(?g_) AS ?g)
+        WHERE {
+          ?s a adto:RoadSegment .
+          OPTIONAL { ?s adto:hasName ?name_ }
+          OPTIONAL { ?s adto:hasStatus ?status_ }
+          OPTIONAL { ?road adto:hasRoadSegment ?s ; adto:hasRoadClass ?class_ }
+          OPTIONAL { ?s (geo:hasGeometry|adto:hasGeometry) ?g_ }
+        }
+        GROUP BY ?s
+      }
       OPTIONAL {
-        ?s (geo:hasGeometry|adto:hasGeometry) ?g .
+        ?s (geo:hasGeometry|adto:hasGeometry) ?g .         # ?s keeps an unbound ?g from matching
         OPTIONAL { ?g geo:asWKT  ?wkt_geo }
         OPTIONAL { ?g adto:asWKT ?wkt_adto }
-      }
-      OPTIONAL {
-        ?s (geo:hasGeometry|adto:hasGeometry) ?g2 .
-        OPTIONAL { ?g2 adto:asGeoJSON ?gj_geom }   # change if your predicate name differs
+        OPTIONAL { ?g adto:asGeoJSON ?gj_geom }          # change if your predicate name differs
       }
       OPTIONAL { ?s adto:asGeoJSON ?gj_subject }
     }
+    GROUP BY ?s ?name ?status ?road_class ?g
     ORDER BY ?s
     """
-    df = sparql_select(q)
-    if not df.empty:
-        df = df.rename(columns={"s":"iri"})
-    for col in ("iri","name","status","wkt","geojson"):
+
+def _roadsegment_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.rename(columns={"s":"iri"})
+    for col in ("iri","name","status","road_class","wkt","geojson"):
         if col not in df.columns:
             df[col] = pd.NA
     return df
 
+def iter_roadsegments(chunk_rows: int = SPARQL_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    for chunk in iter_sparql_select(ROADSEGMENT_QUERY, chunk_rows, name="roadsegments"):
+        yield _roadsegment_columns(chunk)
+
+def fetch_roadsegments() -> pd.DataFrame:
+    return _roadsegment_columns(sparql_select(ROADSEGMENT_QUERY, name="roadsegments"))
+
 # ---------- Geometry ----------
-def _clean_wkt(s: str) -> str:
-    if not s: return s
-    s2 = str(s).strip()
-    if s2.upper().startswith("SRID=") and ";" in s2:
-        s2 = s2.split(";",1)[1].strip()
-    m = re.match(r"^<[^>]+>\s*(.*)$", s2)  # drop leading <...CRS...>
-    if m: s2 = m.group(1).strip()
-    return s2
-
-def _geom_from_literals(wkt_str: Optional[str], geojson_str: Optional[str]):
-    # WKT first
-    if wkt_str:
-        try:
-            return shapely_wkt.loads(_clean_wkt(wkt_str))
-        except Exception:
-            pass
-    # GeoJSON fallback
-    if geojson_str:
-        try:
-            gj = json.loads(geojson_str)
-            if isinstance(gj, dict) and gj.get("type") == "Feature":
-                gj = gj.get("geometry")
-            return shapely_shape(gj) if gj else None
-        except Exception:
-            pass
-    return None
+# Whole-column pipeline: literals are decoded into one shapely geometry array,
+# every vertex is reprojected with a single pyproj call, and lengths/centroids
+# are computed by GEOS over the array. No per-segment Python work on the hot path.
+_SRID_PREFIX = re.compile(r"^SRID=[^;]*;", re.IGNORECASE)
+_CRS_PREFIX  = re.compile(r"^<[^>]+>")                 # leading <...CRS...> IRI
+_LENGTH_TYPES = (1, 2, 3, 5, 6)   # LineString, LinearRing, Polygon, MultiLineString, MultiPolygon
+
+def _clean_wkt_literals(values) -> np.ndarray:
+    s = pd.Series(values, dtype="object").str.strip()
+    s = s.str.replace(_SRID_PREFIX, "", regex=True).str.strip()
+    s = s.str.replace(_CRS_PREFIX, "", regex=True).str.strip()
+    out = s.to_numpy(dtype=object, copy=True)
+    out[pd.isna(out) | (out == "")] = None
+    return out
+
+def _geom_from_geojson(geojson_str):
+    try:
+        gj = json.loads(geojson_str)
+        if isinstance(gj, dict) and gj.get("type") == "Feature":
+            gj = gj.get("geometry")
+        return shapely_shape(gj) if gj else None
+    except Exception:
+        return None
+
+@_with_stack
+def parse_geometries(wkt_values, geojson_values) -> np.ndarray:
+    """Decode WKT literals in bulk; rows without usable WKT fall back to GeoJSON."""
+    geoms = shapely.from_wkt(_clean_wkt_literals(wkt_values), on_invalid="ignore")
+    missing = np.flatnonzero(shapely.is_missing(geoms))
+    if missing.size:
+        gj = pd.Series(geojson_values, dtype="object").to_numpy(dtype=object)
+        for i in missing:
+            if isinstance(gj[i], str) and gj[i]:
+                geoms[i] = _geom_from_geojson(gj[i])
+    return geoms
+
+def reproject(geoms: np.ndarray, transformer: Transformer) -> np.ndarray:
+    """Reproject a geometry array (2D out) with one transformer call over all vertices."""
+    def _xy(coords):
+        x, y = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack([x, y])
+    return shapely.transform(geoms, _xy)
 
 def _utm_epsg_for_lonlat(lon: float, lat: float) -> int:
     zone = int(math.floor((lon + 180) / 6) + 1)
     return 32600 + zone if lat >= 0 else 32700 + zone
 
+def _utm_epsgs(geoms: np.ndarray) -> np.ndarray:
+    """UTM EPSG code per geometry from its centroid; 0 where the geometry is missing."""
+    c = shapely.centroid(geoms)
+    lon, lat = shapely.get_x(c), shapely.get_y(c)
+    ok = np.isfinite(lon) & np.isfinite(lat)
+    zone = np.clip(np.floor((np.where(ok, lon, 0) + 180) / 6).astype(np.int64) + 1, 1, 60)
+    return np.where(ok, np.where(lat >= 0, 32600, 32700) + zone, 0)
+
+# CRS/Transformer construction costs milliseconds each (PROJ database lookups);
+# keep one per EPSG for the life of the process.
+@lru_cache(maxsize=64)
+@_with_stack
+def _crs(epsg: int) -> CRS:
+    return CRS.from_epsg(epsg)
+
+@lru_cache(maxsize=64)
+@_with_stack
+def _transformer(epsg: int) -> Transformer:
+    return Transformer.from_crs("EPSG:4326", _crs(epsg), always_xy=True)
+
+@lru_cache(maxsize=1)
+@_with_stack
+def _geod() -> Geod:
+    return Geod(ellps="WGS84")
+
+@_with_stack
 def project_to_meters(df: pd.DataFrame, default_epsg: Optional[int] = DEFAULT_EPSG):
     df = df.copy()
     for col in ("wkt","geojson"):
         if col not in df.columns:
             df[col] = pd.Series([None]*len(df), dtype="object")
-    df["geom"] = [ _geom_from_literals(w,g) for w,g in zip(df["wkt"], df["geojson"]) ]
-    df["geom_m"] = pd.Series([None]*len(df), dtype="object")
-
-    valid = df["geom"].dropna()
-    if valid.empty:
-        return df, CRS.from_epsg(default_epsg or 4326)
-
-    lons = [g.centroid.x for g in valid]
-    lats = [g.centroid.y for g in valid]
-    mean_lon = sum(lons)/len(lons)
-    mean_lat = sum(lats)/len(lats)
+    geoms = parse_geometries(df["wkt"], df["geojson"])
+    df["geom"] = pd.Series(geoms, index=df.index, dtype="object")
+    df["geom_m"] = pd.Series([None]*len(df), index=df.index, dtype="object")
 
-    epsg = default_epsg or _utm_epsg_for_lonlat(mean_lon, mean_lat)
-    crs_m = CRS.from_epsg(epsg)
+    present = ~shapely.is_missing(geoms)
+    if not present.any():
+        return df, _crs(default_epsg or 4326)
 
-    transformer = Transformer.from_crs("EPSG:4326", crs_m, always_xy=True)
-    def _proj(g):
-        return shp_transform(lambda x,y, z=None: transformer.transform(x,y), g)
+    epsg = default_epsg
+    if not epsg:
+        c = shapely.centroid(geoms[present])
+        epsg = _utm_epsg_for_lonlat(float(shapely.get_x(c).mean()), float(shapely.get_y(c).mean()))
+    crs_m = _crs(epsg)
 
-    df.loc[valid.index, "geom_m"] = [ _proj(g) for g in valid ]
+    df["geom_m"] = pd.Series(reproject(geoms, _transformer(epsg)), index=df.index, dtype="object")
     return df, crs_m
 
+@_with_stack
+def lengths_m(geoms) -> np.ndarray:
+    """Vectorized `length_m`: line/polygon perimeter length, 0.0 for anything else."""
+    arr = np.asarray(geoms, dtype=object)
+    lengths = shapely.length(arr)
+    return np.where(np.isin(shapely.get_type_id(arr), _LENGTH_TYPES), lengths, 0.0)
+
+@_with_stack
 def length_m(g):
     if g is None: return 0.0
     if isinstance(g, (LineString, MultiLineString)):
@@ -172,87 +463,977 @@ def length_m(g):
         return g.length
     return 0.0
 
+@_with_stack
+def geodesic_lengths(geoms) -> np.ndarray:
+    """WGS84 ellipsoidal length (lon/lat input), same geometry rules as `lengths_m`."""
+    geoms = np.asarray(geoms, dtype=object)
+    out = np.zeros(len(geoms))
+    sel = np.flatnonzero(np.isin(shapely.get_type_id(geoms), _LENGTH_TYPES))
+    if not sel.size:
+        return out
+    parts, part_of = shapely.get_parts(geoms[sel], return_index=True)
+    is_poly = shapely.get_type_id(parts) == 3
+    rings, ring_of = shapely.get_rings(parts[is_poly], return_index=True)
+    lines = np.concatenate([parts[~is_poly], rings])
+    line_of = np.concatenate([part_of[~is_poly], part_of[is_poly][ring_of]])
+
+    coords, vert_of = shapely.get_coordinates(lines, return_index=True)
+    same = vert_of[1:] == vert_of[:-1]            # consecutive vertices of the same line
+    if same.any():
+        a, b = coords[:-1][same], coords[1:][same]
+        _, _, dist = _geod().inv(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+        per_line = np.bincount(vert_of[1:][same], weights=dist, minlength=len(lines))
+        out[sel] = np.bincount(line_of, weights=per_line, minlength=len(sel))
+    return out
+
+@_with_stack
+def segment_lengths(geoms: np.ndarray, seg_epsg: np.ndarray, mode: str = LENGTH_MODE,
+                    geom_m: Optional[np.ndarray] = None, map_epsg: int = 0) -> np.ndarray:
+    """
+    Length engine. "geodesic": ellipsoidal lengths over the lon/lat arrays.
+    "projected": each segment measured in its own EPSG (`seg_epsg`), one batched
+    reprojection per distinct zone; rows already projected into `map_epsg` reuse `geom_m`.
+    """
+    if mode == "geodesic":
+        return geodesic_lengths(geoms)
+    out = np.zeros(len(geoms))
+    for epsg in np.unique(seg_epsg[seg_epsg > 0]):
+        idx = np.flatnonzero(seg_epsg == epsg)
+        if geom_m is not None and epsg == map_epsg:
+            out[idx] = lengths_m(geom_m[idx])
+        else:
+            out[idx] = lengths_m(reproject(geoms[idx], _transformer(int(epsg))))
+    return out
+
+# ---------- Segment cache ----------
+# Persistent per-segment results keyed by (IRI, length mode) and validated against
+# a hash of the geometry literal. A report run only parses and measures rows whose
+# literal is new or changed; everything else is rebuilt from stored WKB. Kept
+# outside REPORT_DIR because that directory is served publicly at /files.
+def _geom_hash(wkt, geojson) -> str:
+    return hashlib.sha1(f"{_lit(wkt)}\x1f{_lit(geojson)}".encode("utf-8")).hexdigest()
+
+class SegmentCache:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        cols = {r[1] for r in self._db.execute("PRAGMA table_info(segment_lengths)")}
+        if cols and "epsg" not in cols:              # keyed without the requested CRS: discard
+            self._db.execute("DROP TABLE segment_lengths")
+        # epsg: the requested DEFAULT_EPSG (0 = auto UTM); seg_epsg: the CRS actually measured in
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS segment_lengths (
+                iri TEXT NOT NULL, mode TEXT NOT NULL, epsg INTEGER NOT NULL, geom_hash TEXT NOT NULL,
+                seg_epsg INTEGER NOT NULL, length_m REAL NOT NULL,
+                minx REAL, miny REAL, maxx REAL, maxy REAL,
+                wkb BLOB, map_epsg INTEGER, wkb_m BLOB,
+                PRIMARY KEY (iri, mode, epsg)
+            )""")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.last_run = {"hits": 0, "misses": 0}
+
+    def lookup(self, iris: List[str], mode: str, epsg: int) -> Dict[str, tuple]:
+        """iri -> (geom_hash, seg_epsg, length_m, wkb, map_epsg, wkb_m)"""
+        found: Dict[str, tuple] = {}
+        uniq = list(dict.fromkeys(iris))
+        with self._lock:
+            for i in range(0, len(uniq), 500):       # stay under SQLite's variable limit
+                part = uniq[i:i + 500]
+                cur = self._db.execute(
+                    f"SELECT iri, geom_hash, seg_epsg, length_m, wkb, map_epsg, wkb_m FROM segment_lengths "
+                    f"WHERE mode = ? AND epsg = ? AND iri IN ({','.join('?' * len(part))})", [mode, epsg, *part])
+                found.update((row[0], row[1:]) for row in cur)
+        return found
+
+    def store(self, rows: List[tuple]):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO segment_lengths VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+
+    def record(self, hits: int, misses: int):
+        with self._lock:
+            self.hits += hits; self.misses += misses
+            self.last_run = {"hits": hits, "misses": misses}
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._db.execute("SELECT COUNT(*) FROM segment_lengths").fetchone()
+            return {"entries": entries, "hits": self.hits, "misses": self.misses,
+                    "last_run": dict(self.last_run)}
+
+# Opened on first use, not at import: spawned render workers re-import this module.
+_segment_cache: Optional[SegmentCache] = None
+_segment_cache_lock = threading.Lock()
+
+def _get_segment_cache() -> Optional[SegmentCache]:
+    global _segment_cache
+    if _segment_cache is None and SEGMENT_CACHE_DB:
+        with _segment_cache_lock:
+            if _segment_cache is None:
+                _segment_cache = SegmentCache(Path(SEGMENT_CACHE_DB).absolute())
+    return _segment_cache
+
+@_with_stack
+def project_segments(df: pd.DataFrame, default_epsg: Optional[int] = DEFAULT_EPSG,
+                     mode: str = LENGTH_MODE, map_epsg: Optional[int] = None):
+    """
+    Parse, project (for maps/corridors) and measure every segment; rows whose literal
+    is unchanged come from the segment cache (keyed on mode and `default_epsg`). The
+    map CRS is `map_epsg`, else `default_epsg`, else the most common per-segment UTM zone.
+    Returns (df + geom/geom_m/length_m, crs_m).
+    """
+    df = df.copy()
+    for col in ("wkt","geojson"):
+        if col not in df.columns:
+            df[col] = pd.Series([None]*len(df), dtype="object")
+    n = len(df)
+    cache = _get_segment_cache() if n and df["iri"].notna().all() else None
+    iris = df["iri"].astype(str).to_numpy()
+
+    hit = np.zeros(n, dtype=bool)
+    if cache is not None:
+        hashes = np.array([_geom_hash(w, g) for w, g in zip(df["wkt"], df["geojson"])], dtype=object)
+        stored = cache.lookup(list(iris), mode, int(default_epsg or 0))
+        hit = np.array([iri in stored and stored[iri][0] == h for iri, h in zip(iris, hashes)], dtype=bool)
+    rows = [stored[iri] for iri in iris[hit]] if hit.any() else []
+    miss = ~hit
+
+    geoms = np.full(n, None, dtype=object)
+    seg_epsg = np.zeros(n, dtype=np.int64)
+    lengths = np.zeros(n)
+    if rows:
+        geoms[hit] = shapely.from_wkb(np.array([r[3] for r in rows], dtype=object))
+        seg_epsg[hit] = [r[1] for r in rows]
+        lengths[hit] = [r[2] for r in rows]
+    if miss.any():
+        with _stage("parse"):
+            geoms[miss] = parse_geometries(df["wkt"].to_numpy()[miss], df["geojson"].to_numpy()[miss])
+        present_miss = ~shapely.is_missing(geoms[miss])
+        seg_epsg[miss] = np.where(present_miss, default_epsg, 0) if default_epsg else _utm_epsgs(geoms[miss])
+
+    present = ~shapely.is_missing(geoms)
+    geom_m = np.full(n, None, dtype=object)
+    if present.any():
+        zones, counts = np.unique(seg_epsg[present & (seg_epsg > 0)], return_counts=True)
+        map_epsg = int(map_epsg or default_epsg or (zones[np.argmax(counts)] if len(zones) else 4326))
+        reuse = np.zeros(n, dtype=bool)
+        if rows:
+            reuse[np.flatnonzero(hit)] = [r[4] == map_epsg and r[5] is not None for r in rows]
+            reused = [r[5] for r, ok in zip(rows, reuse[hit]) if ok]
+            if reused:
+                geom_m[reuse] = shapely.from_wkb(np.array(reused, dtype=object))
+        todo = present & ~reuse
+        if todo.any():
+            geom_m[todo] = reproject(geoms[todo], _transformer(map_epsg))
+    else:
+        map_epsg = int(map_epsg or default_epsg or 4326)
+
+    if miss.any():
+        lengths[miss] = segment_lengths(geoms[miss], seg_epsg[miss], mode, geom_m[miss], map_epsg)
+
+    if cache is not None:
+        write = miss | (present & ~reuse) if present.any() else miss
+        bounds = shapely.bounds(geoms[write])               # lon/lat; NaN for missing geometry
+        cache.store([
+            (iri, mode, int(default_epsg or 0), h, int(se), float(ln),
+             *(None if np.isnan(v) else float(v) for v in bb), gb, map_epsg, gmb)
+            for iri, h, se, ln, bb, gb, gmb in zip(
+                iris[write], hashes[write], seg_epsg[write], lengths[write], bounds,
+                shapely.to_wkb(geoms[write]), shapely.to_wkb(geom_m[write]))
+        ])
+        cache.record(int(hit.sum()), int(miss.sum()))
+
+    df["geom"] = pd.Series(geoms, index=df.index, dtype="object")
+    df["geom_m"] = pd.Series(geom_m, index=df.index, dtype="object")
+    df["length_m"] = lengths
+    return df, _crs(map_epsg)
+
+# ---------- Map ----------
+# All segments go into one LineCollection (a single draw call / PDF path batch).
+# Vertices closer together than half an output pixel are simplified away first,
+# so the page cost tracks the output resolution rather than the network size.
+def _line_parts(geoms: np.ndarray, tolerance: float) -> Tuple[List[np.ndarray], np.ndarray]:
+    """Split line geometries into per-part vertex arrays; returns (parts, source row per part)."""
+    rows = np.flatnonzero(~shapely.is_missing(geoms))
+    g = geoms[rows]
+    if tolerance > 0:
+        g = shapely.simplify(g, tolerance, preserve_topology=False)
+    parts, part_row = shapely.get_parts(g, return_index=True)
+    keep = np.isin(shapely.get_type_id(parts), (1, 2)) & ~shapely.is_empty(parts)
+    parts, part_row = parts[keep], rows[part_row[keep]]
+    if not len(parts):
+        return [], part_row
+    coords, vert_part = shapely.get_coordinates(parts, return_index=True)
+    return np.split(coords, np.flatnonzero(np.diff(vert_part)) + 1), part_row
+
+@_with_stack
+def map_segments(geoms, categories, dpi: int = REPORT_MAP_DPI, fig_width: float = 8.5) -> dict:
+    """Simplified vertex arrays plus category codes/levels, ready for a LineCollection."""
+    geoms = np.asarray(geoms, dtype=object)
+    xmin, ymin, xmax, ymax = shapely.total_bounds(geoms)
+    extent = max(xmax - xmin, ymax - ymin) if np.isfinite(xmin) else 0.0
+    segments, part_row = _line_parts(geoms, extent / (fig_width * dpi) / 2 if extent else 0.0)
+    cats = pd.Series(categories, dtype="object").fillna("unknown").astype(str).to_numpy()[part_row]
+    levels, codes = np.unique(cats, return_inverse=True)
+    return {"segments": segments, "codes": codes, "levels": list(levels)}
+
+@_with_stack
+def draw_segment_map(ax, geoms, categories, dpi: int = REPORT_MAP_DPI, linewidth: float = 0.6):
+    _draw_map(ax, linewidth=linewidth,
+              **map_segments(geoms, categories, dpi, ax.figure.get_figwidth()))
+
+def _draw_map(ax, segments: List[np.ndarray], codes: np.ndarray, levels: List[str], linewidth: float = 0.6):
+    if not segments:
+        return
+    cmap = matplotlib.colormaps["tab10"]
+    ax.add_collection(LineCollection(segments, colors=cmap(codes % cmap.N), linewidths=linewidth))
+    ax.autoscale_view()
+    ax.set_aspect("equal", adjustable="datalim")
+    ax.legend(handles=[Line2D([], [], color=cmap(i % cmap.N), label=lvl) for i, lvl in enumerate(levels)],
+              loc="best", fontsize=8)
+
+# ---------- Corridors ----------
+# Each projected segment is buffered by `buffer_meters`; zones and water mains that
+# intersect the corridor are found through an STRtree (bulk query, O(n log n))
+# instead of comparing every corridor against every layer feature.
+LAYER_QUERY = """
+SELECT ?s ?label
+       (COALESCE(?wkt_geo, ?wkt_adto) AS ?wkt)
+       ?geojson
+WHERE {
+  ?s a adto:%(cls)s ;
+     (geo:hasGeometry|adto:hasGeometry) ?g .
+  OPTIONAL { ?s rdfs:label ?label }
+  OPTIONAL { ?g geo:asWKT  ?wkt_geo }
+  OPTIONAL { ?g adto:asWKT ?wkt_adto }
+  OPTIONAL { ?g adto:asGeoJSON ?geojson }
+}
+ORDER BY ?s
+"""
+# layer key -> (ADTO class, GeoJSON fallback file, label property in that file)
+CORRIDOR_LAYERS = {
+    "zones":       ("Zone",      "zones.geojson",        "Zone_Name"),
+    "water_mains": ("WaterMain", "water_supply.geojson", "Name"),
+}
+
+def _layer_from_geojson(path: Path, label_prop: str) -> pd.DataFrame:
+    fc = json.loads(path.read_text(encoding="utf-8"))
+    rows = []
+    for i, feat in enumerate(fc.get("features", [])):
+        props = feat.get("properties") or {}
+        rows.append({
+            "iri": f"{path.name}#{props.get('fid', i)}",
+            "label": props.get(label_prop),
+            "wkt": None,
+            "geojson": json.dumps(feat.get("geometry")) if feat.get("geometry") else None,
+        })
+    return pd.DataFrame(rows, columns=["iri", "label", "wkt", "geojson"])
+
+@_with_stack
+def fetch_layer(key: str) -> pd.DataFrame:
+    """Layer features from the KG; falls back to the geoJSON/ export when the KG has none."""
+    cls, fname, label_prop = CORRIDOR_LAYERS[key]
+    df = sparql_select(LAYER_QUERY % {"cls": cls}, name=key).rename(columns={"s": "iri"})
+    if df.empty and (GEOJSON_DIR / fname).exists():
+        return _layer_from_geojson(GEOJSON_DIR / fname, label_prop)
+    for col in ("iri", "label", "wkt", "geojson"):
+        if col not in df.columns:
+            df[col] = pd.NA
+    return df
+
+def fetch_corridor_layers() -> Dict[str, pd.DataFrame]:
+    return {key: fetch_layer(key) for key in CORRIDOR_LAYERS}
+
+# layer key -> (STRtree over the features in the map CRS, their labels)
+CorridorIndex = Dict[str, Tuple["shapely.STRtree", "np.ndarray"]]
+
+@_with_stack
+def corridor_index(layers: Dict[str, pd.DataFrame], crs_m: CRS) -> CorridorIndex:
+    """Parse, project and index the corridor layers once for a CRS (reused across export chunks)."""
+    index: CorridorIndex = {}
+    for key, layer in layers.items():
+        lp, _ = project_to_meters(layer, crs_m.to_epsg())
+        geoms = np.asarray(lp["geom_m"], dtype=object)
+        keep = np.flatnonzero(~shapely.is_missing(geoms))
+        labels = lp["label"].fillna(lp["iri"]).astype(str).to_numpy()[keep]
+        index[key] = (shapely.STRtree(geoms[keep]), labels)
+    return index
+
+@_with_stack
+def corridor_overlaps(roads_p: pd.DataFrame, crs_m: CRS, buffer_meters: float,
+                      layers: Dict[str, pd.DataFrame], index: Optional[CorridorIndex] = None
+                      ) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Returns (per_segment, pairs). per_segment has `<layer>` (";"-joined labels) and
+    `<layer>_count` columns aligned to roads_p; pairs[layer] lists (segment row, label).
+    Pass `index` (corridor_index for the same crs_m) to skip re-indexing the layers.
+    """
+    corridors = np.asarray(roads_p["geom_m"], dtype=object)
+    if buffer_meters > 0:
+        corridors = shapely.buffer(corridors, buffer_meters)
+    per_segment = pd.DataFrame(index=roads_p.index)
+    pairs: Dict[str, pd.DataFrame] = {}
+
+    for key, (tree, labels) in (index if index is not None else corridor_index(layers, crs_m)).items():
+        seg, hit = tree.query(corridors, predicate="intersects")
+        hits = pd.DataFrame({"row": seg, "label": labels[hit]}).drop_duplicates()
+        pairs[key] = hits
+
+        grouped = hits.sort_values("label").groupby("row")["label"]
+        per_segment[key] = pd.Series(grouped.agg(";".join).reindex(range(len(roads_p))).to_numpy(),
+                                     index=roads_p.index, dtype="object")
+        per_segment[f"{key}_count"] = grouped.size().reindex(range(len(roads_p)), fill_value=0).to_numpy()
+    return per_segment, pairs
+
+def _overlap_summary(pairs: pd.DataFrame, lengths: np.ndarray) -> pd.DataFrame:
+    df = pairs.assign(length_m=lengths[pairs["row"].to_numpy()])
+    return (df.groupby("label").agg(segments=("row", "nunique"), length_m=("length_m", "sum"))
+              .reset_index().sort_values(["segments", "length_m"], ascending=False))
+
 # ---------- Report ----------
-def build_roadsegment_report(out_pdf: Path, buffer_meters: float = 5.0) -> Path:
-    roads = fetch_roadsegments()
-    roads_p, crs_m = project_to_meters(roads, DEFAULT_EPSG)
-    roads_p["length_m"] = roads_p["geom_m"].map(length_m)
+ProgressFn = Callable[[str, float], None]
 
-    with PdfPages(str(out_pdf)) as pdf:
-        # Page 1 — summary
-        fig = plt.figure(figsize=(8.5, 11)); ax = fig.add_subplot(111); ax.axis("off")
-        ax.text(0.02, 0.95, "RoadSegment Length Report", fontsize=18, weight="bold")
-        ax.text(0.02, 0.91, f"Projected CRS: {crs_m.to_string()}", fontsize=10)
-        ax.text(0.02, 0.88, f"Segments: {len(roads_p)}", fontsize=10)
-        ax.text(0.02, 0.85, f"Total length: {roads_p['length_m'].sum():,.0f} m", fontsize=10)
-        pdf.savefig(fig); plt.close(fig)
+# Pages are described as (renderer, kwargs) specs holding plain, picklable data.
+# Each page is drawn to its own PDF (in a process pool for large reports, else
+# in-process) and the pages are merged in order with pypdf; only without pypdf do
+# they go through PdfPages. CreationDate is left out so identical inputs give
+# byte-identical files on either path.
+PDF_METADATA = {"CreationDate": None}
 
-        # Page 2 — histogram
-        fig = plt.figure(figsize=(8.5, 11))
-        ax = fig.add_subplot(111)
-        ax.set_title("Road segment lengths (m)")
-        roads_p["length_m"].plot(kind="hist", bins=24, ax=ax)
-        ax.set_xlabel("meters"); ax.set_ylabel("count")
-        pdf.savefig(fig); plt.close(fig)
-
-        # Page 3 — top table
-        fig = plt.figure(figsize=(8.5, 11)); ax = fig.add_subplot(111); ax.axis("off")
-        ax.set_title("Top segments by length (m)")
-        top = roads_p[["iri","name","status","length_m"]]\
-              .sort_values("length_m", ascending=False).head(20).copy()
-        top["length_m"] = top["length_m"].map(lambda v: f"{v:,.0f}")
-        table = ax.table(cellText=top.values, colLabels=list(top.columns),
+def _render_summary(fig, lines: List[Tuple[float, str, float, str]]):
+    ax = fig.add_subplot(111); ax.axis("off")
+    for y, text, size, weight in lines:
+        ax.text(0.02, y, text, fontsize=size, weight=weight)
+
+def _render_histogram(fig, title: str, values: np.ndarray):
+    ax = fig.add_subplot(111)
+    ax.set_title(title)
+    ax.hist(values, bins=24)
+    ax.set_xlabel("meters"); ax.set_ylabel("count")
+
+def _render_table(fig, title: str, columns: List[str], rows: List[list]):
+    ax = fig.add_subplot(111); ax.axis("off")
+    ax.set_title(title)
+    if not rows:
+        ax.text(0.02, 0.95, "No matches.", fontsize=10)
+    else:
+        table = ax.table(cellText=rows, colLabels=columns,
                          loc="upper left", colLoc="left", cellLoc="left")
         table.auto_set_font_size(False); table.set_fontsize(8); table.scale(1, 1.2)
-        pdf.savefig(fig); plt.close(fig)
 
-        # Page 4 — quick map
-        fig = plt.figure(figsize=(8.5, 11))
-        ax = fig.add_subplot(111)
-        ax.set_title("Road segments (projected meters)")
-        for g in roads_p["geom_m"].dropna().head(1000):
-            try:
-                if isinstance(g, LineString):
-                    x, y = g.xy; ax.plot(x, y, linewidth=0.6)
-                elif isinstance(g, MultiLineString):
-                    for part in g.geoms:
-                        x, y = part.xy; ax.plot(x, y, linewidth=0.6)
-            except Exception:
-                pass
-        ax.set_xlabel("X (m)"); ax.set_ylabel("Y (m)")
-        pdf.savefig(fig); plt.close(fig)
+def _render_map(fig, title: str, **layer):
+    ax = fig.add_subplot(111)
+    ax.set_title(title)
+    _draw_map(ax, **layer)
+    ax.set_xlabel("X (m)"); ax.set_ylabel("Y (m)")
+
+_PAGE_RENDERERS = {
+    "summary": _render_summary, "histogram": _render_histogram,
+    "table": _render_table, "map": _render_map,
+}
+
+@_with_stack
+def render_page(spec: Tuple[str, dict]) -> Figure:
+    kind, kwargs = spec
+    fig = Figure(figsize=(8.5, 11))
+    _PAGE_RENDERERS[kind](fig, **kwargs)
+    return fig
+
+def _render_page_pdf(spec: Tuple[str, dict]) -> Tuple[bytes, float]:
+    t0 = time.perf_counter()
+    buf = io.BytesIO()
+    render_page(spec).savefig(buf, format="pdf", metadata=PDF_METADATA)
+    return buf.getvalue(), time.perf_counter() - t0
+
+def _table_spec(title: str, df: pd.DataFrame) -> Tuple[str, dict]:
+    return ("table", {"title": title, "columns": list(df.columns), "rows": df.values.tolist()})
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn: workers must not inherit the server's threads/locks
+            _render_pool = ProcessPoolExecutor(max_workers=RENDER_PROCS,
+                                               mp_context=multiprocessing.get_context("spawn"))
+        return _render_pool
+
+@_with_stack
+def write_pages(out_pdf: Path, specs: List[Tuple[str, dict]], step: ProgressFn, parallel: bool = True):
+    try:
+        from pypdf import PdfReader, PdfWriter    # in requirements.txt; without it pages render in-process
+    except ImportError:
+        PdfWriter = None
+    if PdfWriter is not None:
+        # pages are always drawn one PDF each and merged here, whether in the pool or
+        # in-process, so both paths give the same bytes (the report cache ignores the mode)
+        pool = parallel and RENDER_PROCS > 0 and len(specs) > 1
+        pages = _get_render_pool().map(_render_page_pdf, specs) if pool else map(_render_page_pdf, specs)
+        writer = PdfWriter()
+        for i, (spec, (page, page_s)) in enumerate(zip(specs, pages)):
+            PAGE_SECONDS.observe(page_s, kind=spec[0])
+            metrics.record_timing(f"page_{spec[0]}", page_s)
+            writer.append(PdfReader(io.BytesIO(page)))
+            step("render", 0.55 + 0.4 * (i + 1) / len(specs))
+        with _stage("write"):
+            writer.compress_identical_objects()       # share the per-page font subsets
+            with open(out_pdf, "wb") as fh:
+                writer.write(fh)
+        return
+    pdf = PdfPages(str(out_pdf), metadata=PDF_METADATA)
+    try:
+        for i, spec in enumerate(specs):
+            with metrics.stage(f"page_{spec[0]}", PAGE_SECONDS, kind=spec[0]):
+                pdf.savefig(render_page(spec))
+            step("render", 0.55 + 0.4 * (i + 1) / len(specs))
+    finally:
+        with _stage("write"):
+            pdf.close()
+
+def report_pages(roads_p: pd.DataFrame, crs_m: CRS, pairs: Dict[str, pd.DataFrame],
+                 buffer_meters: float, map_color_by: str, length_mode: str) -> List[Tuple[str, dict]]:
+    lengths = roads_p["length_m"].to_numpy()
+    specs = [
+        # Page 1 — summary
+        ("summary", {"lines": [
+            (0.95, "RoadSegment Length Report", 18, "bold"),
+            (0.91, f"Projected CRS: {crs_m.to_string()}", 10, "normal"),
+            (0.88, f"Segments: {len(roads_p)}", 10, "normal"),
+            (0.85, f"Total length: {roads_p['length_m'].sum():,.0f} m", 10, "normal"),
+            (0.82, f"Length mode: {length_mode}", 10, "normal"),
+        ]}),
+        # Page 2 — histogram
+        ("histogram", {"title": "Road segment lengths (m)", "values": roads_p["length_m"].dropna().to_numpy()}),
+    ]
+    # Page 3 — top table
+    top = roads_p[["iri","name","status","length_m"]]\
+          .sort_values("length_m", ascending=False).head(20).copy()
+    top["length_m"] = top["length_m"].map(lambda v: f"{v:,.0f}")
+    specs.append(_table_spec("Top segments by length (m)", top))
+    # Page 4 — quick map
+    specs.append(("map", {"title": f"Road segments (projected meters) by {map_color_by}",
+                          **map_segments(roads_p["geom_m"], roads_p[map_color_by], REPORT_MAP_DPI)}))
+    # Pages 5+ — corridor overlaps (segments buffered by buffer_meters)
+    for key, title in (("zones", "Zones"), ("water_mains", "Water mains")):
+        summary = _overlap_summary(pairs[key], lengths).head(40)
+        summary["length_m"] = summary["length_m"].map(lambda v: f"{v:,.0f}")
+        specs.append(_table_spec(f"{title} within {buffer_meters:g} m of road segments", summary))
+    return specs
+
+@_with_stack
+def build_roadsegment_report(out_pdf: Path, buffer_meters: float = 5.0,
+                             map_color_by: str = "status",
+                             length_mode: str = LENGTH_MODE,
+                             progress: Optional[ProgressFn] = None,
+                             roads: Optional[pd.DataFrame] = None,
+                             layers: Optional[Dict[str, pd.DataFrame]] = None) -> Path:
+    step = progress or (lambda stage, frac: None)
+
+    if roads is None:
+        step("fetch", 0.05)
+        with _stage("fetch"):
+            roads = fetch_roadsegments()
+    if layers is None:
+        with _stage("fetch"):
+            layers = fetch_corridor_layers()
+    step("project", 0.35)
+    with _stage("project"):
+        roads_p, crs_m = project_segments(roads, DEFAULT_EPSG, length_mode)
+    step("corridors", 0.45)
+    with _stage("corridors"):
+        _, pairs = corridor_overlaps(roads_p, crs_m, buffer_meters, layers)
+
+    step("render", 0.55)
+    with _stage("pages"):
+        specs = report_pages(roads_p, crs_m, pairs, buffer_meters, map_color_by, length_mode)
+    with _stage("render"):
+        write_pages(out_pdf, specs, step, parallel=len(roads_p) >= RENDER_PARALLEL_MIN)
+    step("write", 0.95)
 
     if not out_pdf.exists():
         raise RuntimeError("PDF was not written")
     return out_pdf
 
+# ---------- Report cache ----------
+# PDFs are content-addressed: the file name is derived from a fingerprint of the
+# fetched RoadSegment rows plus the report parameters, so an unchanged graph maps
+# to an existing file. Before any full fetch, PROBE_QUERY asks the KG for a one-row
+# aggregate (triple count plus a checksum) over everything the report reads; while
+# it matches the probe taken when the fingerprint was computed, the cached PDF is
+# served without fetching a single geometry. Within CACHE_CHECK_TTL even the probe
+# is skipped. Cached PDFs unused for REPORT_CACHE_MAX_AGE are deleted, and the
+# least recently used go first once they exceed REPORT_CACHE_MAX_MB.
+REPORT_LAYOUT_VERSION = "3"    # bump when page layout changes so cached PDFs are rebuilt
+
+# Every triple of the segments, the roads that list them, the corridor layer features
+# and their geometry nodes. Each adds its MD5's decimal digits (letters dropped, order
+# kept: ~20 digits per row) to a sum. One row comes back, so Fuseki answers it far
+# cheaper than the full fetch; the in-process rdflib engine walks the same triples
+# in Python, where CACHE_CHECK_TTL can amortise it.
+PROBE_QUERY = """
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+SELECT (COUNT(*) AS ?n) (SUM(?h) AS ?sum) WHERE {
+  { VALUES ?cls { adto:RoadSegment %(layers)s } ?x a ?cls . ?x ?p ?o }
+  UNION { VALUES ?cls { adto:RoadSegment %(layers)s }
+          ?f a ?cls ; (geo:hasGeometry|adto:hasGeometry) ?x . ?x ?p ?o }
+  UNION { ?seg a adto:RoadSegment . ?x adto:hasRoadSegment ?seg . ?x ?p ?o }
+  BIND(MD5(CONCAT(IF(isBlank(?x), "_", STR(?x)), " ", STR(?p), " ",
+                  IF(isBlank(?o), "_", STR(?o)))) AS ?md5)
+  BIND(xsd:integer(CONCAT("0", REPLACE(?md5, "[a-f]", ""))) AS ?h)
+}
+""" % {"layers": " ".join(f"adto:{cls}" for cls, _, _ in CORRIDOR_LAYERS.values())}
+
+_fp_memo: Dict[str, Tuple[float, str, str]] = {}   # params key -> (checked_at, probe, fingerprint)
+_fp_lock = threading.Lock()
+_prune_lock = threading.Lock()
+
+def kg_probe() -> Optional[str]:
+    """Cheap KG change signal (one aggregate row), or None if the probe fails."""
+    try:
+        with _stage("probe"):
+            df = sparql_select(PROBE_QUERY, name="probe")
+    except Exception as e:
+        log.warning("report cache probe failed, falling back to a full fetch: %s", e)
+        return None
+    row = df.iloc[0] if len(df) else {}
+    files = []                      # GeoJSON fallbacks are read when the KG has no layer features
+    for _, fname, _ in CORRIDOR_LAYERS.values():
+        path = GEOJSON_DIR / fname
+        st = path.stat() if path.exists() else None
+        files.append(f"{fname}:{st.st_mtime_ns}:{st.st_size}" if st else f"{fname}:-")
+    return "|".join([_lit(row.get("n")), _lit(row.get("sum")), *files])
+
+def prune_report_cache(keep: Optional[Path] = None) -> int:
+    """Delete cached PDFs past REPORT_CACHE_MAX_AGE, then the least recently used until
+    the rest fit REPORT_CACHE_MAX_MB. `keep` is never deleted. Returns the files removed."""
+    if not (REPORT_CACHE_MAX_MB > 0 or REPORT_CACHE_MAX_AGE > 0):
+        return 0
+    removed = 0
+    with _prune_lock:
+        files = []
+        for path in REPORT_DIR.glob("roadsegment_report_*.pdf"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        files.sort(key=lambda f: f[0], reverse=True)           # most recently used first
+        now, total = time.time(), 0
+        for mtime, size, path in files:
+            too_old = REPORT_CACHE_MAX_AGE > 0 and now - mtime > REPORT_CACHE_MAX_AGE
+            too_big = REPORT_CACHE_MAX_MB > 0 and total + size > REPORT_CACHE_MAX_MB * 2**20
+            if path != keep and (too_old or too_big):
+                try:
+                    path.unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                continue
+            total += size
+    return removed
+
+def _lit(v) -> str:
+    return "" if v is None or (not isinstance(v, str) and pd.isna(v)) else str(v)
+
+def _hash_rows(h, df: pd.DataFrame, attrs: Tuple[str, ...]):
+    rows = sorted(
+        tuple(_lit(v) for v in row)
+        for row in zip(*(df[c] for c in attrs), df["wkt"], df["geojson"])
+    )
+    for row in rows:
+        geom_hash = _geom_hash(row[-2], row[-1])
+        h.update("\x1f".join(row[:-2] + (geom_hash,)).encode("utf-8") + b"\n")
+
+@_with_stack
+def snapshot_fingerprint(roads: pd.DataFrame, params: dict,
+                         layers: Optional[Dict[str, pd.DataFrame]] = None) -> str:
+    h = hashlib.sha256()
+    h.update(f"layout={REPORT_LAYOUT_VERSION};epsg={DEFAULT_EPSG};".encode("utf-8"))
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    _hash_rows(h, roads, ("iri", "name", "status", "road_class"))
+    for key in sorted(layers or {}):
+        h.update(f"\x1elayer={key}\n".encode("utf-8"))
+        _hash_rows(h, layers[key], ("iri", "label"))
+    return h.hexdigest()
+
+def cached_report_path(fingerprint: str) -> Path:
+    return REPORT_DIR / f"roadsegment_report_{fingerprint[:24]}.pdf"
+
+@_with_stack
+def get_or_build_report(params: dict, refresh: bool = False,
+                        progress: Optional[ProgressFn] = None) -> Tuple[Path, bool]:
+    """Return (pdf_path, cache_hit); only rebuilds when the KG snapshot or params changed."""
+    step = progress or (lambda stage, frac: None)
+    key = json.dumps(params, sort_keys=True)
+
+    with _fp_lock:
+        memo = _fp_memo.get(key)
+    if not refresh and memo and time.time() - memo[0] < CACHE_CHECK_TTL:
+        out = cached_report_path(memo[2])
+        if out.exists():
+            return _served_from_cache(out), True
+
+    # taken before the fetch, so a write landing during it shows up on the next probe
+    probe = kg_probe()
+    if not refresh and memo and probe is not None and probe == memo[1]:
+        out = cached_report_path(memo[2])
+        if out.exists():
+            with _fp_lock:
+                _fp_memo[key] = (time.time(), probe, memo[2])
+            return _served_from_cache(out), True
+
+    step("fetch", 0.05)
+    try:
+        with _stage("fetch"):
+            roads = fetch_roadsegments()
+            layers = fetch_corridor_layers()
+        with _stage("fingerprint"):
+            fp = snapshot_fingerprint(roads, params, layers)
+        out = cached_report_path(fp)
+        hit = not refresh and out.exists()
+        if not hit:
+            tmp = out.with_name(f"{out.stem}.{uuid.uuid4().hex[:6]}.part")
+            try:
+                build_roadsegment_report(tmp, progress=progress, roads=roads, layers=layers, **params)
+                os.replace(tmp, out)        # atomic: readers never see a half-written PDF
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+            REPORT_BYTES.inc(out.stat().st_size)
+            prune_report_cache(keep=out)
+        else:
+            os.utime(out)                   # mtime marks last use for pruning
+    except Exception:
+        REPORTS.inc(outcome="error")
+        raise
+    REPORTS.inc(outcome="cached" if hit else "built")
+
+    if probe is not None:
+        with _fp_lock:
+            _fp_memo[key] = (time.time(), probe, fp)
+    return out, hit
+
+def _served_from_cache(out: Path) -> Path:
+    try:
+        os.utime(out)
+    except FileNotFoundError:
+        pass
+    REPORTS.inc(outcome="cached")
+    return out
+
+def _public_base(request: Request) -> str:
+    return PUBLIC_BASE_URL.rstrip("/") if PUBLIC_BASE_URL else str(request.base_url).rstrip("/")
+
+def _public_url(request: Request, fname: str) -> str:
+    return f"{_public_base(request)}/files/{fname}"
+
+# ---------- Jobs ----------
+# Bounded worker pool; the HTTP handler only enqueues. Identical requests that are
+# still queued/running share one job instead of building the same PDF twice.
+# The pool is created on first submit (render workers re-import this module).
+_executor: Optional[ThreadPoolExecutor] = None
+_jobs: Dict[str, dict] = {}
+_inflight: Dict[str, str] = {}     # dedupe key -> job_id
+_jobs_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report")
+        return _executor
+
+def _job_key(body: ReportRequest) -> str:
+    return json.dumps(body.model_dump(), sort_keys=True)
+
+def _prune_jobs(now: float):
+    # caller holds _jobs_lock
+    for jid in [j for j, rec in _jobs.items()
+                if rec["finished_at"] and now - rec["finished_at"] > JOB_TTL_S]:
+        del _jobs[jid]
+
+def _update_job(job_id: str, **fields):
+    with _jobs_lock:
+        rec = _jobs.get(job_id)
+        if rec is not None:
+            rec.update(fields)
+
+def _run_job(job_id: str, key: str, body: ReportRequest):
+    _update_job(job_id, status="running", stage="start", started_at=time.time())
+    try:
+        with metrics.collect_timings() as timings:
+            fpath, hit = get_or_build_report(
+                body.report_params(), refresh=body.refresh,
+                progress=lambda stage, frac: _update_job(job_id, stage=stage, progress=round(frac, 2)),
+            )
+        _update_job(job_id, status="done", stage="done", progress=1.0, cached=hit,
+                    file_name=fpath.name, size_bytes=fpath.stat().st_size,
+                    timings_ms=metrics.summarize(timings))
+    except Exception as e:
+        _update_job(job_id, status="error", error=f"Report generation failed: {e}")
+    finally:
+        with _jobs_lock:
+            if _inflight.get(key) == job_id:
+                del _inflight[key]
+            if job_id in _jobs:
+                _jobs[job_id]["finished_at"] = time.time()
+
+def submit_report_job(body: ReportRequest) -> tuple:
+    """Enqueue a report build; returns (job_record, deduplicated)."""
+    key = _job_key(body)
+    now = time.time()
+    with _jobs_lock:
+        _prune_jobs(now)
+        jid = _inflight.get(key)
+        if jid and jid in _jobs:
+            return dict(_jobs[jid]), True
+        active = sum(1 for rec in _jobs.values() if rec["status"] in ("queued", "running"))
+        if active >= REPORT_MAX_JOBS:
+            raise HTTPException(status_code=429, detail="Report queue is full, retry later")
+        jid = uuid.uuid4().hex
+        _jobs[jid] = {
+            "job_id": jid, "status": "queued", "stage": "queued", "progress": 0.0,
+            "params": body.model_dump(), "created_at": now, "started_at": None, "finished_at": None,
+            "file_name": None, "size_bytes": None, "cached": None, "error": None,
+        }
+        _inflight[key] = jid
+        rec = dict(_jobs[jid])
+    _get_executor().submit(_run_job, jid, key, body)
+    return rec, False
+
+def _get_job_or_404(job_id: str) -> dict:
+    with _jobs_lock:
+        rec = _jobs.get(job_id)
+        if rec is None:
+            raise HTTPException(status_code=404, detail="Unknown job_id")
+        return dict(rec)
+
+# ---------- Exports ----------
+# Per-segment results streamed straight from the SPARQL chunks: each chunk is
+# projected, measured, serialized and released before the next is read, so the
+# response starts immediately and memory stays flat regardless of network size.
+EXPORT_COLUMNS = ["iri", "name", "status", "road_class", "length_m"]
+EXPORT_MEDIA = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "ndjson": "application/x-ndjson",
+}
+
+CORRIDOR_COLUMNS = [c for key in CORRIDOR_LAYERS for c in (key, f"{key}_count")]
+
+@_with_stack
+def iter_segment_lengths(chunk_rows: int = EXPORT_CHUNK_ROWS,
+                         buffer_meters: Optional[float] = None,
+                         length_mode: str = LENGTH_MODE) -> Iterator[pd.DataFrame]:
+    """Projected per-segment lengths chunk by chunk; adds corridor columns when buffer_meters is set."""
+    layers = fetch_corridor_layers() if buffer_meters is not None else None
+    indexes: Dict[int, CorridorIndex] = {}   # per CRS: the fixed map CRS, plus any geometry-less lead chunks
+    map_epsg = None
+    for chunk in iter_roadsegments(chunk_rows):
+        proj, crs_m = project_segments(chunk, DEFAULT_EPSG, length_mode, map_epsg)
+        if map_epsg is None and proj["geom_m"].notna().any():
+            map_epsg = crs_m.to_epsg()   # first chunk with geometry fixes the corridor CRS
+        if layers is not None:
+            epsg = crs_m.to_epsg()
+            if epsg not in indexes:
+                indexes[epsg] = corridor_index(layers, crs_m)
+            per_segment, _ = corridor_overlaps(proj, crs_m, buffer_meters, layers, indexes[epsg])
+            proj = proj.join(per_segment)
+        yield proj
+
+def _export_frame(df: pd.DataFrame, with_geometry: bool) -> pd.DataFrame:
+    out = df[EXPORT_COLUMNS + [c for c in CORRIDOR_COLUMNS if c in df.columns]].copy()
+    if with_geometry:
+        out["geometry"] = shapely.to_wkt(np.asarray(df["geom"], dtype=object))
+    return out
+
+def _csv_stream(chunks: Iterator[pd.DataFrame], with_geometry: bool) -> Iterator[str]:
+    header = True
+    for df in chunks:
+        yield _export_frame(df, with_geometry).to_csv(index=False, header=header)
+        header = False
+
+def _ndjson_stream(chunks: Iterator[pd.DataFrame], with_geometry: bool) -> Iterator[str]:
+    for df in chunks:
+        props = _export_frame(df, False).astype(object)
+        props = props.where(props.notna(), None).to_dict("records")
+        geoms = (shapely.to_geojson(np.asarray(df["geom"], dtype=object)) if with_geometry
+                 else [None] * len(df))
+        yield "".join(
+            f'{{"type":"Feature","geometry":{g or "null"},"properties":{json.dumps(p)}}}\n'
+            for g, p in zip(geoms, props)
+        )
+
+class _ByteSink:
+    """Write-only file object; ParquetWriter writes into it and the stream drains it."""
+    closed = False
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._pos = 0
+    def write(self, b) -> int:
+        self._parts.append(bytes(b)); self._pos += len(b)
+        return len(b)
+    def tell(self) -> int:
+        return self._pos
+    def flush(self):
+        pass
+    def close(self):
+        self.closed = True
+    def drain(self) -> bytes:
+        out = b"".join(self._parts); self._parts.clear()
+        return out
+
+def _parquet_stream(chunks: Iterator[pd.DataFrame], with_geometry: bool) -> Iterator[bytes]:
+    import pyarrow as pa, pyarrow.parquet as pq
+    first = next(chunks)
+    fields = [(c, pa.string()) for c in EXPORT_COLUMNS[:-1]] + [("length_m", pa.float64())]
+    fields += [(c, pa.int64() if c.endswith("_count") else pa.string())
+               for c in CORRIDOR_COLUMNS if c in first.columns]
+    if with_geometry:
+        fields.append(("geometry", pa.string()))   # WKT, EPSG:4326
+    schema = pa.schema(fields)
+    text_cols = [f.name for f in schema if f.type == pa.string()]
+    sink = _ByteSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for df in itertools.chain([first], chunks):
+            out = _export_frame(df, with_geometry).astype({c: "object" for c in text_cols})
+            out = out.where(out.notna(), None)
+            writer.write_table(pa.Table.from_pandas(out, schema=schema, preserve_index=False))
+            yield sink.drain()            # one row group per chunk
+    yield sink.drain()                    # footer
+
+_EXPORT_WRITERS = {"csv": _csv_stream, "ndjson": _ndjson_stream, "parquet": _parquet_stream}
+
+# ---------- Warm-up ----------
+# Cold costs of the first report: stack imports, matplotlib's font cache and the
+# first PDF font embedding, PROJ database lookups and (if used) spawning the render
+# pool. warm_up() pays them ahead of time; it runs at startup when REPORT_WARMUP is
+# set, or on demand via POST /warmup.
+_warm: Dict[str, float] = {}
+
+def _warm_render_worker(_: int) -> int:
+    _load_stack()
+    return os.getpid()
+
+def warm_up(pool: bool = False) -> Dict[str, float]:
+    def timed(name: str, fn: Callable):
+        t0 = time.perf_counter()
+        fn()
+        _warm[name] = round(time.perf_counter() - t0, 3)
+    timed("stack", _load_stack)
+    timed("fonts", lambda: _render_page_pdf(("summary", {"lines": [(0.5, "warm-up", 10, "bold")]})))
+    timed("crs", lambda: (_transformer(DEFAULT_EPSG or 32644), _geod()))   # 32644: UTM 44N (Amaravati)
+    if pool and RENDER_PROCS > 0:
+        timed("render_pool", lambda: list(_get_render_pool().map(_warm_render_worker, range(RENDER_PROCS))))
+    return dict(_warm)
+
 # ---------- Routes ----------
 @app.get("/health")
 def health():
-    return {"ok": True}
+    return {"ok": True, "import_s": round(IMPORT_S, 3), "stack_loaded": _stack_loaded, "warm": _warm}
+
+@app.post("/warmup")
+def warmup(pool: bool = False, x_api_key: Optional[str] = Header(None)):
+    _auth_or_403(x_api_key)
+    return {"ok": True, "timings": warm_up(pool)}
 
 @app.post("/reports/roadsegments")
 def create_road_report(body: ReportRequest, request: Request, x_api_key: Optional[str] = Header(None)):
     _auth_or_403(x_api_key)
 
-    # unique file
-    ts = time.strftime("%Y%m%d-%H%M%S")
-    fname = f"roadsegment_report_{ts}_{uuid.uuid4().hex[:6]}.pdf"
-    fpath = REPORT_DIR / fname
-
     try:
-        build_roadsegment_report(fpath, buffer_meters=body.buffer_meters)
+        fpath, hit = get_or_build_report(body.report_params(), refresh=body.refresh)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report generation failed: {e}")
 
-    # public link
-    base = (PUBLIC_BASE_URL.rstrip("/") if PUBLIC_BASE_URL else str(request.base_url).rstrip("/"))
-    url = f"{base}/files/{fname}"
-
+    fname = fpath.name
     size = fpath.stat().st_size if fpath.exists() else 0
     return {
         "status": "ok",
         "file_name": fname,
         "size_bytes": size,
-        "url": url
+        "cached": hit,
+        "timings_ms": metrics.summarize(),
+        "url": _public_url(request, fname)
     }
+
+@app.get("/reports/cache/segments")
+def segment_cache_stats(x_api_key: Optional[str] = Header(None)):
+    _auth_or_403(x_api_key)
+    cache = _get_segment_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@app.get("/reports/roadsegments/export")
+def export_road_segments(format: Literal["csv", "parquet", "ndjson"] = "csv",
+                         geometry: Optional[bool] = None,
+                         buffer_meters: Optional[float] = None,
+                         length_mode: Literal["projected", "geodesic"] = LENGTH_MODE,
+                         x_api_key: Optional[str] = Header(None)):
+    _auth_or_403(x_api_key)
+    with_geometry = (format == "ndjson") if geometry is None else geometry
+    if format == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401  (optional dependency)
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+
+    # pull the first chunk eagerly so upstream failures still map to an HTTP error
+    chunks = iter_segment_lengths(buffer_meters=buffer_meters, length_mode=length_mode)
+    try:
+        first = next(chunks)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Segment query failed: {e}")
+
+    ts = time.strftime("%Y%m%d-%H%M%S")
+    return StreamingResponse(
+        _EXPORT_WRITERS[format](itertools.chain([first], chunks), with_geometry),
+        media_type=EXPORT_MEDIA[format],
+        headers={"Content-Disposition": f'attachment; filename="roadsegment_lengths_{ts}.{format}"'},
+    )
+
+@app.post("/reports/roadsegments/jobs", status_code=202)
+def submit_road_report_job(body: ReportRequest, request: Request, x_api_key: Optional[str] = Header(None)):
+    _auth_or_403(x_api_key)
+    rec, dedup = submit_report_job(body)
+    base = _public_base(request)
+    return {
+        "job_id": rec["job_id"],
+        "status": rec["status"],
+        "deduplicated": dedup,
+        "status_url": f"{base}/reports/jobs/{rec['job_id']}",
+        "result_url": f"{base}/reports/jobs/{rec['job_id']}/result",
+    }
+
+@app.get("/reports/jobs/{job_id}")
+def get_road_report_job(job_id: str, x_api_key: Optional[str] = Header(None)):
+    _auth_or_403(x_api_key)
+    return _get_job_or_404(job_id)
+
+@app.get("/reports/jobs/{job_id}/result")
+def get_road_report_result(job_id: str, request: Request, x_api_key: Optional[str] = Header(None)):
+    _auth_or_403(x_api_key)
+    rec = _get_job_or_404(job_id)
+    if rec["status"] == "error":
+        raise HTTPException(status_code=500, detail=rec["error"])
+    if rec["status"] != "done":
+        # not ready yet: 202 so pollers can keep waiting
+        return JSONResponse(status_code=202, content={
+            "status": rec["status"], "stage": rec["stage"], "progress": rec["progress"],
+        })
+    return {
+        "status": "ok",
+        "file_name": rec["file_name"],
+        "size_bytes": rec["size_bytes"],
+        "cached": rec["cached"],
+        "timings_ms": rec.get("timings_ms", {}),
+        "url": _public_url(request, rec["file_name"])
+    }
+
+IMPORT_S = time.perf_counter() - _IMPORT_T0     # warned about (over IMPORT_BUDGET_S) at startup
@@ -0,0 +1,252 @@
+# tile_api.py
+import os, json, math, hashlib, threading, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+
+import requests
+import numpy as np
+import shapely                      # >= 2.0: vectorized geometry-array API
+
+# ---------- Config (env) ----------
+SPARQL_ENDPOINT = os.getenv("SPARQL_ENDPOINT", "http://localhost:8111/query")  # proxy JSON or direct /sparql
+USE_PROXY_JSON  = SPARQL_ENDPOINT.endswith("/query")
+TILE_SOURCE     = os.getenv("TILE_SOURCE", "kg")          # "kg" or "geojson"
+GEOJSON_DIR     = Path(os.getenv("GEOJSON_DIR", Path(__file__).resolve().parent.parent / "geoJSON"))
+ZOOM_LEVELS     = [int(z) for z in os.getenv("TILE_ZOOMS", "8,10,12,14,16").split(",")]
+TILE_MAX_AGE    = int(os.getenv("TILE_MAX_AGE", "3600"))  # Cache-Control max-age (s)
+TILE_CACHE_SIZE = int(os.getenv("TILE_CACHE_SIZE", "2048"))  # encoded tiles kept in memory
+TILE_PX         = 256
+
+PREFIXES = """
+PREFIX adto: <http://www.projectsynapse.com/ontologies/adto#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX geo:  <http://www.opengis.net/ont/geosparql#>
+"""
+
+# layer -> (ADTO class, GeoJSON file or None, name property in that file)
+LAYERS = {
+    "roads":       ("Road",        "road.geojson",         "Rd_Name"),
+    "segments":    ("RoadSegment", None,                   None),
+    "zones":       ("Zone",        "zones.geojson",        "Zone_Name"),
+    "water_mains": ("WaterMain",   "water_supply.geojson", "Name"),
+}
+
+LAYER_QUERY = """
+SELECT ?s ?n1 ?n2 ?status ?gj
+WHERE {
+  ?s a adto:%(cls)s ;
+     (geo:hasGeometry|adto:hasGeometry) ?g .
+  ?g adto:asGeoJSON ?gj .
+  OPTIONAL { ?s adto:hasName ?n1 }
+  OPTIONAL { ?s rdfs:label ?n2 }
+  OPTIONAL { ?s adto:hasStatus ?status }
+}
+"""
+
+# ---------- FastAPI ----------
+app = FastAPI(title="ADTO Tile API", version="1.0")
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"], allow_credentials=False,
+    allow_methods=["*"], allow_headers=["*"],
+)
+
+# ---------- Sources ----------
+def _sparql_bindings(query: str) -> List[dict]:
+    if USE_PROXY_JSON:
+        r = requests.post(SPARQL_ENDPOINT, json={"query": PREFIXES + query}, timeout=120)
+    else:
+        r = requests.post(
+            SPARQL_ENDPOINT,
+            headers={"Accept":"application/sparql-results+json",
+                     "Content-Type":"application/sparql-query"},
+            data=(PREFIXES + query).encode("utf-8"),
+            timeout=120,
+        )
+    r.raise_for_status()
+    return r.json().get("results", {}).get("bindings", [])
+
+def _features_from_kg(cls: str) -> Tuple[List[dict], List[Optional[str]]]:
+    props, literals = [], []
+    for b in _sparql_bindings(LAYER_QUERY % {"cls": cls}):
+        v = {k: t.get("value") for k, t in b.items()}
+        props.append({"iri": v.get("s"), "name": v.get("n1") or v.get("n2"), "status": v.get("status")})
+        literals.append(v.get("gj"))
+    return props, literals
+
+def _features_from_geojson(fname: Optional[str], name_prop: Optional[str]) -> Tuple[List[dict], List[Optional[str]]]:
+    path = GEOJSON_DIR / fname if fname else None
+    if not path or not path.exists():
+        return [], []
+    props, literals = [], []
+    for i, feat in enumerate(json.loads(path.read_text(encoding="utf-8")).get("features", [])):
+        p = feat.get("properties") or {}
+        props.append({"iri": f"{fname}#{p.get('fid', i)}", "name": p.get(name_prop), "status": None})
+        literals.append(json.dumps(feat["geometry"]) if feat.get("geometry") else None)
+    return props, literals
+
+# ---------- Pyramid ----------
+# Each layer is simplified once per zoom level (half a pixel at that zoom, in
+# degrees) and indexed with an STRtree. A tile or bbox request is then an index
+# lookup plus clipping of the pre-simplified geometries at the nearest level.
+def _half_pixel_deg(z: int) -> float:
+    return 360.0 / (TILE_PX * 2 ** z) / 2
+
+def _decimals(z: int) -> int:
+    return max(0, math.ceil(math.log10(1 / _half_pixel_deg(z))))
+
+class LayerPyramid:
+    def __init__(self, name: str, props: List[dict], literals: List[Optional[str]]):
+        geoms = shapely.from_geojson(np.asarray(literals, dtype=object), on_invalid="ignore")
+        keep = np.flatnonzero(~shapely.is_missing(geoms) & ~shapely.is_empty(geoms))
+        self.name = name
+        self.props = [json.dumps({k: v for k, v in props[i].items() if v is not None}) for i in keep]
+        self.full = shapely.force_2d(geoms[keep])
+        self.tree = shapely.STRtree(self.full)
+        self.levels: Dict[int, np.ndarray] = {}
+        for z in sorted(ZOOM_LEVELS):
+            d = _decimals(z)
+            g = shapely.simplify(self.full, _half_pixel_deg(z), preserve_topology=True)
+            self.levels[z] = shapely.transform(g, lambda c, d=d: np.round(c, d))
+
+    def level_for(self, z: int) -> np.ndarray:
+        if z > max(self.levels):
+            return self.full            # past the deepest level: full resolution
+        lower = [lz for lz in self.levels if lz <= z]
+        return self.levels[max(lower) if lower else min(self.levels)]
+
+    def features(self, bbox: Tuple[float, float, float, float], z: int, clip: bool) -> List[str]:
+        idx = self.tree.query(shapely.box(*bbox), predicate="intersects")
+        if not len(idx):
+            return []
+        idx.sort()
+        geoms = self.level_for(z)
+        g = geoms[idx]
+        if clip:
+            pad = _half_pixel_deg(z) * 8
+            g = shapely.clip_by_rect(g, bbox[0] - pad, bbox[1] - pad, bbox[2] + pad, bbox[3] + pad)
+        keep = ~shapely.is_empty(g)
+        return [f'{{"type":"Feature","geometry":{s},"properties":{self.props[i]}}}'
+                for s, i in zip(shapely.to_geojson(g[keep]), idx[keep])]
+
+_state: Dict[str, object] = {"version": None, "layers": {}, "built_at": None, "attempts": 0, "error": None}
+_state_lock = threading.Lock()
+_build_lock = threading.Lock()      # one build at a time; concurrent first requests wait for it
+_tile_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_tile_lock = threading.Lock()
+
+def build_pyramids() -> Dict[str, LayerPyramid]:
+    layers: Dict[str, LayerPyramid] = {}
+    h = hashlib.sha1()
+    for name, (cls, fname, name_prop) in LAYERS.items():
+        if TILE_SOURCE == "geojson":
+            props, literals = _features_from_geojson(fname, name_prop)
+        else:
+            props, literals = _features_from_kg(cls)
+        layers[name] = LayerPyramid(name, props, literals)
+        for p, lit in zip(props, literals):
+            h.update(f"{name}\x1f{p.get('iri')}\x1f{lit}\n".encode("utf-8"))
+    with _state_lock:
+        _state.update(version=h.hexdigest()[:16], layers=layers, built_at=time.time())
+    with _tile_lock:
+        _tile_cache.clear()
+    return layers
+
+def _build() -> Dict[str, LayerPyramid]:
+    """build_pyramids() for the routes (caller holds _build_lock): upstream failures become 502/504."""
+    _state["attempts"] += 1
+    try:
+        layers = build_pyramids()
+    except requests.Timeout as e:
+        _state["error"] = (504, f"Layer query timed out: {e}")
+    except (requests.RequestException, ValueError) as e:   # HTTP errors, bad JSON
+        _state["error"] = (502, f"Layer query failed: {e}")
+    else:
+        _state["error"] = None
+        return layers
+    raise HTTPException(status_code=_state["error"][0], detail=_state["error"][1])
+
+def _pyramid(layer: str) -> LayerPyramid:
+    if _state["version"] is None:
+        seen = _state["attempts"]
+        with _build_lock:
+            if _state["version"] is None:
+                if _state["attempts"] != seen and _state["error"]:   # failed while we waited: share it
+                    raise HTTPException(status_code=_state["error"][0], detail=_state["error"][1])
+                _build()
+    pyr = _state["layers"].get(layer)
+    if pyr is None:
+        raise HTTPException(status_code=404, detail=f"Unknown layer '{layer}'")
+    return pyr
+
+# ---------- Tiles ----------
+def tile_bbox(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    n = 2 ** z
+    def lat(yy):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * yy / n))))
+    return (x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y))
+
+def _feature_collection(features: List[str]) -> bytes:
+    return ('{"type":"FeatureCollection","features":[' + ",".join(features) + "]}").encode("utf-8")
+
+def _cached_response(request: Request, key: tuple, build) -> Response:
+    etag = '"' + hashlib.sha1(repr((_state["version"],) + key).encode("utf-8")).hexdigest()[:20] + '"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={TILE_MAX_AGE}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    with _tile_lock:
+        body = _tile_cache.get(key)
+        if body is not None:
+            _tile_cache.move_to_end(key)
+    if body is None:
+        body = build()
+        with _tile_lock:
+            _tile_cache[key] = body
+            while len(_tile_cache) > TILE_CACHE_SIZE:
+                _tile_cache.popitem(last=False)
+    return Response(content=body, media_type="application/geo+json", headers=headers)
+
+# ---------- Routes ----------
+@app.get("/health")
+def health():
+    return {"ok": True, "source": TILE_SOURCE, "version": _state["version"]}
+
+@app.get("/layers")
+def list_layers():
+    _pyramid("roads")
+    return {
+        "version": _state["version"],
+        "zooms": sorted(ZOOM_LEVELS),
+        "layers": {name: len(p.full) for name, p in _state["layers"].items()},
+    }
+
+@app.post("/layers/reload")
+def reload_layers():
+    with _build_lock:
+        layers = _build()
+    return {"ok": True, "version": _state["version"], "layers": {n: len(p.full) for n, p in layers.items()}}
+
+@app.get("/tiles/{layer}/{z}/{x}/{y}.geojson")
+def get_tile(layer: str, z: int, x: int, y: int, request: Request):
+    if z < 0 or z > 24 or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="Tile out of range")
+    pyr = _pyramid(layer)
+    bbox = tile_bbox(z, x, y)
+    return _cached_response(request, ("tile", layer, z, x, y),
+                            lambda: _feature_collection(pyr.features(bbox, z, clip=True)))
+
+@app.get("/features/{layer}")
+def get_features(layer: str, bbox: str, request: Request, zoom: int = 14):
+    try:
+        minx, miny, maxx, maxy = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be minLon,minLat,maxLon,maxLat")
+    pyr = _pyramid(layer)
+    box = (minx, miny, maxx, maxy)
+    return _cached_response(request, ("bbox", layer, zoom) + box,
+                            lambda: _feature_collection(pyr.features(box, zoom, clip=False)))
@@ -0,0 +1,131 @@
+# test_fuseki_proxy.py
+# Proxy behaviour against a stub upstream (httpx MockTransport, no Fuseki needed).
+import asyncio, sys
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "support_api"))
+import fuseki_proxy as fp
+
+@pytest.fixture
+def upstream(monkeypatch):
+    seen = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json={"count": 1, "tripleCount": 1, "quadCount": 0})
+    monkeypatch.setattr(fp, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(fp, "_local", None)
+    monkeypatch.setattr(fp, "_cache", None)
+    yield seen
+
+def _read_timeout(request: httpx.Request) -> float:
+    return request.extensions["timeout"]["read"]
+
+def test_load_uses_load_timeout_not_max_timeout(upstream):
+    assert fp.LOAD_TIMEOUT > fp.MAX_TIMEOUT                     # defaults: 1800 vs 300
+    r = TestClient(fp.app).post("/load", content=b"<urn:a> <urn:p> <urn:b> .",
+                                headers={"content-type": "text/turtle"})
+    assert r.status_code == 200, r.text
+    assert _read_timeout(upstream[-1]) == fp.LOAD_TIMEOUT
+
+def test_load_timeout_param_is_capped_at_load_timeout(upstream):
+    client = TestClient(fp.app)
+    client.post("/load", params={"timeout": fp.MAX_TIMEOUT + 600}, content=b"",
+                headers={"content-type": "text/turtle"})
+    assert _read_timeout(upstream[-1]) == fp.MAX_TIMEOUT + 600
+    client.post("/load", params={"timeout": fp.LOAD_TIMEOUT * 10}, content=b"",
+                headers={"content-type": "text/turtle"})
+    assert _read_timeout(upstream[-1]) == fp.LOAD_TIMEOUT
+
+def test_query_timeout_still_capped_at_max_timeout(upstream):
+    TestClient(fp.app).post("/query", json={"query": "SELECT * WHERE { ?s ?p ?o }", "timeout": 10_000})
+    assert _read_timeout(upstream[-1]) == fp.MAX_TIMEOUT
+
+def test_update_batch_separator_survives_trailing_comments(upstream):
+    r = TestClient(fp.app).post("/update/batch", json={"updates": [
+        "INSERT DATA { <urn:a> <urn:p> 1 } # first",
+        "INSERT DATA { <urn:b> <urn:p> 2 };"]})
+    assert r.status_code == 200, r.text
+    assert upstream[-1].content.decode() == (
+        "INSERT DATA { <urn:a> <urn:p> 1 } # first\n;\nINSERT DATA { <urn:b> <urn:p> 2 }")
+
+def test_local_engine_missing_files_is_503(upstream, monkeypatch, tmp_path):
+    local_sparql = pytest.importorskip("local_sparql")
+    monkeypatch.setattr(fp, "_local", local_sparql.LocalStore([tmp_path / "missing.ttl"]))
+    r = TestClient(fp.app).post("/query", json={"query": "SELECT * WHERE { ?s ?p ?o }"})
+    assert r.status_code == 503
+    assert "missing.ttl" in r.json()["detail"]
+
+# ---------- Result cache, coalescing and /query/batch (stub upstream echoing the query) ----------
+@pytest.fixture
+def sparql(monkeypatch):
+    seen = []
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        await asyncio.sleep(0.05)                       # long enough for concurrent callers to overlap
+        if request.url.path.endswith("/update"):
+            return httpx.Response(204)
+        return httpx.Response(200, json={"query": request.content.decode()},
+                              headers={"content-type": "application/sparql-results+json"})
+    monkeypatch.setattr(fp, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(fp, "_local", None)
+    monkeypatch.setattr(fp, "_cache", fp.ResultCache(2**20, 2**20, 0))
+    monkeypatch.setattr(fp, "CACHE_INVALIDATE", "flush")
+    yield seen
+
+def _queries(seen):
+    return [r for r in seen if r.url.path.endswith("/sparql")]
+
+def test_cache_hits_normalized_repeat(sparql):
+    client = TestClient(fp.app)
+    first = client.post("/query", json={"query": "SELECT * WHERE { ?s ?p ?o }"})
+    again = client.post("/query", json={"query": "SELECT  *\n WHERE {?s ?p ?o}  # same"})
+    assert (first.headers["x-cache"], again.headers["x-cache"]) == ("MISS", "HIT")
+    assert again.content == first.content
+    assert len(_queries(sparql)) == 1
+    bypass = client.post("/query", json={"query": "SELECT * WHERE { ?s ?p ?o }", "cache": False})
+    assert bypass.headers["x-cache"] == "BYPASS" and len(_queries(sparql)) == 2
+
+def test_update_invalidates_cache(sparql):
+    client = TestClient(fp.app)
+    q = {"query": "SELECT * WHERE { ?s ?p ?o }"}
+    client.post("/query", json=q)
+    r = client.post("/update", json={"query": "INSERT DATA { <urn:a> <urn:p> <urn:b> }"})
+    assert r.json() == {"ok": True, "cache_invalidated": 1}
+    assert client.post("/query", json=q).headers["x-cache"] == "MISS"
+    assert len(_queries(sparql)) == 2
+
+def test_cache_put_from_older_generation_is_dropped():
+    cache = fp.ResultCache(2**20, 2**20, 0)
+    generation = cache.generation
+    cache.invalidate()                                  # a write lands while the read is in flight
+    cache.put("k", b"{}", "application/json", frozenset(), generation)
+    assert cache.get("k") is None
+    cache.put("k", b"{}", "application/json", frozenset(), cache.generation)
+    assert cache.get("k") == (b"{}", "application/json")
+
+def test_concurrent_identical_queries_share_one_upstream_call(sparql, monkeypatch):
+    monkeypatch.setattr(fp, "COALESCE", True)
+    q = "SELECT * WHERE { ?s ?p ?o }"
+    async def run():
+        return await asyncio.gather(*(fp._execute(fp.SPARQLQuery(query=q, cache=False)) for _ in range(3)))
+    results = asyncio.run(run())
+    assert len(_queries(sparql)) == 1
+    assert [h.get("X-Coalesced") for _, h in results].count("1") == 2
+    assert len({r[0] for r, _ in results}) == 1
+
+def test_batch_keeps_request_order(sparql):
+    queries = [f"SELECT * WHERE {{ ?s ?p {i} }}" for i in range(5)]
+    r = TestClient(fp.app).post("/query/batch", json={"queries": [{"query": q} for q in queries]})
+    results = r.json()["results"]
+    assert [x["ok"] for x in results] == [True] * 5
+    assert [x["result"]["query"] for x in results] == queries
+
+def test_batch_result_over_stream_buffer_is_413(sparql, monkeypatch):
+    monkeypatch.setattr(fp, "STREAM_BUFFER_MB", 1 / 2**20)  # 1 byte: every result spills
+    r = TestClient(fp.app).post("/query/batch", json={"queries": [{"query": "SELECT * WHERE { ?s ?p ?o }"}]})
+    assert r.json()["results"] == [{"ok": False, "status": 413,
+                                    "error": "Result exceeds PROXY_STREAM_BUFFER_MB; run it through /query"}]